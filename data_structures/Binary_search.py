@@ -1,12 +1,18 @@
+import sys
+import tempfile
 from random import choice, sample
 from string import ascii_lowercase, digits
+import numpy as np
 
 chars = ascii_lowercase + digits # random usernames
 
-def binary_search(sorted_list, target):
+def binary_search(sorted_list, target, stats=None):
     """
     Iterative binary search. Returns True if target exists in sorted_list
+    (pass an OpStats as 'stats' to record the comparisons made)
     """
+    if stats is not None:
+        return _binary_search_counted(sorted_list, target, stats)
     left, right = 0, len(sorted_list) - 1
     while left <= right:
         mid = (left + right) // 2
@@ -18,6 +24,153 @@ def binary_search(sorted_list, target):
             right = mid - 1
     return False
 
+def _binary_search_counted(sorted_list, target, stats):
+    left, right = 0, len(sorted_list) - 1
+    comparisons, found = 0, False
+    while left <= right:
+        mid = (left + right) // 2
+        comparisons += 1
+        if sorted_list[mid] == target:
+            found = True
+            break
+        elif sorted_list[mid] < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+    stats.count("lookups")
+    stats.count("hits", found)
+    stats.observe("comparisons", comparisons)
+    return found
+
+def sorted_list_memory_usage(sorted_list):
+    """
+    Deep size of the plain sorted list used by binary_search: the list plus every string.
+    Returns {"bytes", "items", "bytes_per_item"} like the structures' memory_usage().
+    """
+    total = sys.getsizeof(sorted_list) + sum(sys.getsizeof(s) for s in sorted_list)
+    n = len(sorted_list)
+    return {"bytes": total, "items": n, "bytes_per_item": total / n if n else 0.0}
+
+def _eytzinger_order(n):
+    """
+    Sorted position of every node of an n-node Eytzinger (BFS-ordered) tree, 1-based like a heap:
+    node k has children 2k and 2k+1 and order[k] is its in-order rank. Computed level by level.
+    """
+    depth = n.bit_length()
+    sizes = np.zeros(2 * n + 2, dtype=np.int64) # subtree sizes, 0 past the last node
+    for d in range(depth - 1, -1, -1):
+        k = np.arange(1 << d, min(1 << (d + 1), n + 1))
+        sizes[k] = 1 + sizes[2 * k] + sizes[2 * k + 1]
+
+    order = np.zeros(n + 1, dtype=np.int64)
+    if n:
+        order[1] = sizes[2]
+    for d in range(depth - 1):
+        k = np.arange(1 << d, min(1 << (d + 1), n + 1))
+        left, right = 2 * k, 2 * k + 1
+        has = left <= n
+        order[left[has]] = order[k[has]] - 1 - sizes[2 * left[has] + 1]
+        has = right <= n
+        order[right[has]] = order[k[has]] + 1 + sizes[2 * right[has]]
+    return order
+
+class SortedIndex:
+    """
+    Static index over sorted usernames stored as fixed-width byte keys.
+    Membership batches are answered with a branch-free search over an Eytzinger (BFS) copy
+    of the keys, where the first levels of the tree share a few cache lines; rank, range and
+    prefix queries use the plain sorted array.
+    """
+    def __init__(self, sorted_usernames):
+        # Also takes an 'S' array of encoded usernames as is
+        if isinstance(sorted_usernames, np.ndarray) and sorted_usernames.dtype.kind == 'S':
+            keys = sorted_usernames
+        else:
+            keys = np.array([u.encode() for u in sorted_usernames], dtype='S')
+        if len(keys) > 1 and not (keys[:-1] <= keys[1:]).all():
+            keys.sort()
+        self.keys = keys
+        self.width = keys.dtype.itemsize
+        self.eytzinger = np.empty(len(keys) + 1, dtype=keys.dtype) # slot 0 unused
+        self.eytzinger[1:] = keys[_eytzinger_order(len(keys))[1:]]
+
+    @classmethod
+    def from_iterable(cls, usernames, chunk_size=None, tmp_dir=None):
+        """
+        Build from unsorted usernames with an external merge sort: sorted runs of one chunk are
+        spilled to temporary files and merged straight into the preallocated key array.
+        Duplicates are dropped.
+        """
+        from data_structures.ingest import chunked, merge_runs, sorted_runs
+        with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+            paths, count, width = sorted_runs(usernames, tmp, chunk_size)
+            keys = np.empty(count, dtype=f'S{max(width, 1)}')
+            n = 0
+            for chunk in chunked(merge_runs(paths), chunk_size):
+                keys[n:n + len(chunk)] = chunk
+                n += len(chunk)
+        return cls(keys if n == count else keys[:n].copy())
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        from data_structures.ingest import read_usernames
+        return cls.from_iterable(read_usernames(path), **kwargs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def memory_usage(self):
+        # Sorted keys plus their Eytzinger copy
+        total = self.keys.nbytes + self.eytzinger.nbytes
+        n = len(self.keys)
+        return {"bytes": total, "items": n, "bytes_per_item": total / n if n else 0.0}
+
+    def _encode(self, usernames):
+        return np.array([u.encode() for u in usernames], dtype='S')
+
+    def _lower_bound(self, queries):
+        # Eytzinger position of the first key >= each query, 0 if there is none
+        n = len(self.keys)
+        k = np.ones(len(queries), dtype=np.int64)
+        for _ in range(n.bit_length()):
+            inside = k <= n
+            # past a leaf keep going right; the trailing right turns are stripped below
+            go_right = np.where(inside, self.eytzinger[np.where(inside, k, 0)] < queries, True)
+            k = 2 * k + go_right
+        # undo the right turns taken after the last left turn, and that left turn itself
+        lowest_zero = ~k & (k + 1)
+        return k >> (np.log2(lowest_zero).astype(np.int64) + 1)
+
+    def contains_many(self, usernames):
+        # Batch membership, returns a numpy array of bools
+        queries = self._encode(usernames)
+        if len(queries) == 0 or len(self.keys) == 0:
+            return np.zeros(len(queries), dtype=bool)
+        k = self._lower_bound(queries)
+        return (k != 0) & (self.eytzinger[k] == queries)
+
+    def contains(self, username):
+        return bool(self.contains_many([username])[0])
+
+    def __contains__(self, username):
+        return self.contains(username)
+
+    def rank(self, username):
+        # Number of usernames strictly smaller than 'username'
+        return int(np.searchsorted(self.keys, username.encode(), side='left'))
+
+    def range(self, low, high):
+        # All usernames u with low <= u < high, in sorted order
+        start, end = np.searchsorted(self.keys, [low.encode(), high.encode()], side='left')
+        return [k.decode() for k in self.keys[start:end]]
+
+    def prefix(self, prefix):
+        # All usernames starting with 'prefix', in sorted order
+        p = prefix.encode()
+        start = np.searchsorted(self.keys, p, side='left')
+        end = np.searchsorted(self.keys, p + b'\xff' * self.width, side='left')
+        return [k.decode() for k in self.keys[start:end]]
+
 def benchmark_binary_search(n, number=1000):
     """
     Generate 'n' usernames, perform 'number' lookups (half existing, half random)
@@ -1,36 +1,430 @@
+import math
+import mmap
+import struct
+from multiprocessing import Pool, cpu_count
+from multiprocessing.shared_memory import SharedMemory
 import mmh3
+import numpy as np
 from bitarray import bitarray
 from random import choice, sample
 from string import ascii_lowercase, digits
 
-# Using MurmurHash3 for both hashing functions
+# On-disk layout: fixed little-endian header followed by the raw bit array bytes
+# magic, format version, hash_count, size (bits), seed, item count
+BLOOM_MAGIC = b'BLMF'
+BLOOM_VERSION = 1
+BLOOM_HEADER = struct.Struct('<4sHHQQQ')
+
+def _hash_pairs(items, seed=0):
+    # One 128-bit MurmurHash3 per key, split into two 64-bit halves -> (n, 2) uint64 array
+    # hash_bytes gives the same halves as mmh3.hash64(..., signed=False) without building Python ints
+    digests = b''.join([mmh3.hash_bytes(item, seed) for item in items])
+    return np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+
+# Using MurmurHash3 (one 128-bit hash per key) + double hashing for the k probe positions
 class BloomFilter:
-    def __init__(self, size=1000000, hash_count=5):
+    def __init__(self, size=1000000, hash_count=5, seed=0):
         self.size = size
         self.hash_count = hash_count
-        self.bit_array = bitarray(size)
+        self.seed = seed
+        self.count = 0 # number of items added
+        self.bit_array = bitarray(size, endian='big')
         self.bit_array.setall(0)
+        self._mmap = None
+
+    @classmethod
+    def from_fpr(cls, expected_items, target_fpr=0.01, seed=0):
+        """
+        Size the filter for 'expected_items' at a false-positive rate of 'target_fpr':
+        m = -n ln(p) / (ln 2)^2 bits and k = (m / n) ln 2 hash functions
+        """
+        if expected_items <= 0 or not 0 < target_fpr < 1:
+            raise ValueError("expected_items must be > 0 and 0 < target_fpr < 1")
+        size = math.ceil(-expected_items * math.log(target_fpr) / math.log(2) ** 2)
+        hash_count = max(1, round(size / expected_items * math.log(2)))
+        return cls(size=size, hash_count=hash_count, seed=seed)
+
+    @classmethod
+    def from_iterable(cls, usernames, expected_items, target_fpr=0.01, seed=0, chunk_size=None):
+        # The bits are sized up front, so the number of usernames must be known (else use ScalableBloomFilter)
+        from data_structures.ingest import ingest
+        bf = cls.from_fpr(expected_items, target_fpr, seed)
+        ingest(bf, usernames, chunk_size)
+        return bf
+
+    @classmethod
+    def from_file(cls, path, expected_items=None, **kwargs):
+        # Without expected_items, a first streaming pass counts the usernames
+        from data_structures.ingest import read_usernames
+        if expected_items is None:
+            expected_items = max(1, sum(1 for _ in read_usernames(path)))
+        return cls.from_iterable(read_usernames(path), expected_items, **kwargs)
+
+    def estimated_fpr(self):
+        # Expected false-positive rate for the current number of items: (1 - e^(-kn/m))^k
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
 
     def _hashes(self, item):
-        # mmh3 returns 32-bit signed int, take abs to avoid negatives
-        return [(abs(mmh3.hash(item, i)) % self.size) for i in range(self.hash_count)]
+        # g_i(x) = h1(x) + i * h2(x) mod m  (Kirsch-Mitzenmacher double hashing),
+        # computed by repeated addition so the loop only handles small ints
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        size = self.size
+        pos, step = h1 % size, h2 % size
+        for _ in range(self.hash_count):
+            yield pos
+            pos += step
+            if pos >= size:
+                pos -= size
+
+    def _positions(self, items):
+        # Same probe positions as _hashes, computed for a whole batch -> (n, k) uint64 array
+        h = _hash_pairs(items, self.seed)
+        size = np.uint64(self.size)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (h[:, :1] % size + steps * (h[:, 1:] % size)) % size
+
+    def _bytes(self):
+        # Writable uint8 view over the bit array (big endian: bit i lives in byte i >> 3, bit 7 - (i & 7))
+        return np.frombuffer(self.bit_array, dtype=np.uint8)
 
     # inserting a username
     def add(self, item):
         for index in self._hashes(item):
             self.bit_array[index] = 1
+        self.count += 1
 
     # checking if a username exists
     def check(self, item):
-        return all(self.bit_array[index] for index in self._hashes(item))
+        # same probes as _hashes, inlined: this is the hot path
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        size, bits = self.size, self.bit_array
+        pos, step = h1 % size, h2 % size
+        for _ in range(self.hash_count):
+            if not bits[pos]:
+                return False # stop at the first unset bit
+            pos += step
+            if pos >= size:
+                pos -= size
+        return True
+
+    # inserting a batch of usernames in one vectorized pass
+    def add_many(self, items):
+        pos = self._positions(items)
+        n = len(pos)
+        pos = pos.ravel()
+        data = self._bytes()
+        if pos.size * 8 >= self.size:
+            # dense batch: scatter into one bool per bit and pack, ~3x cheaper than bitwise_or.at
+            bits = np.zeros(len(data) * 8, dtype=bool)
+            bits[pos] = True
+            np.bitwise_or(data, np.packbits(bits), out=data)
+        elif pos.size:
+            # sparse batch: an m-byte temporary would cost more than the scatter itself
+            masks = np.left_shift(1, 7 - (pos & 7)).astype(np.uint8)
+            np.bitwise_or.at(data, pos >> 3, masks)
+        self.count += n
+
+    # checking a batch of usernames, returns a numpy array of bools
+    def check_many(self, items):
+        pos = self._positions(items)
+        bits = (self._bytes()[pos >> 3] >> (7 - (pos & 7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def memory_usage(self):
+        # Bytes held by the bit array (mapped bytes for a filter returned by open())
+        total = self.bit_array.nbytes
+        return {"bytes": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
+
+    # Membership protocol names (see data_structures/membership.py)
+    contains = check
+    contains_many = check_many
+
+    def __contains__(self, item):
+        return self.check(item)
+
+    # Opt-in statistics (see data_structures/stats.py)
+    stats = None
+
+    def enable_stats(self, timer=None):
+        from data_structures.stats import OpStats, instrument
+        self.stats = OpStats(timer)
+        instrument(self, self.stats, {"check": self._check_counted, "contains": self._check_counted})
+        return self.stats
+
+    def disable_stats(self):
+        from data_structures.stats import uninstrument
+        uninstrument(self, ("check", "contains"))
+        self.stats = None
+
+    def _check_counted(self, item):
+        # check() that records the bits read before answering ("bits_probed")
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        size, bits = self.size, self.bit_array
+        pos, step = h1 % size, h2 % size
+        probed, found = 0, True
+        for _ in range(self.hash_count):
+            probed += 1
+            if not bits[pos]:
+                found = False
+                break
+            pos = (pos + step) % size
+        self.stats.count("lookups")
+        self.stats.count("positives", found)
+        self.stats.observe("bits_probed", probed)
+        return found
+
+    def collect_stats(self):
+        report = self.stats.summary() if self.stats is not None else {}
+        report["fill_ratio"] = self.bit_array.count() / self.size
+        report["estimated_fpr"] = self.estimated_fpr()
+        return report
+
+    def _check_compatible(self, other):
+        if (self.size, self.hash_count, self.seed) != (other.size, other.hash_count, other.seed):
+            raise ValueError("Bloom filters must have the same size, hash_count and seed to be merged")
+
+    def _estimate_count(self):
+        # Swamidass & Baldi estimate of the number of distinct items from the number of set bits
+        ones = self.bit_array.count(1)
+        if ones >= self.size:
+            return self.count
+        return round(-self.size / self.hash_count * math.log(1 - ones / self.size))
+
+    # Merges work on the byte views: a filter from open() wraps the whole mapped buffer, so its
+    # bitarray is rounded up to a multiple of 8 bits while a private one has exactly 'size' bits
+    def __ior__(self, other):
+        self._check_compatible(other)
+        bits = self._bytes()
+        np.bitwise_or(bits, other._bytes(), out=bits)
+        self.count = self._estimate_count()
+        return self
+
+    def __iand__(self, other):
+        self._check_compatible(other)
+        bits = self._bytes()
+        np.bitwise_and(bits, other._bytes(), out=bits)
+        self.count = self._estimate_count()
+        return self
+
+    def copy(self):
+        bf = BloomFilter(self.size, self.hash_count, self.seed)
+        bf._bytes()[:] = self._bytes()
+        bf.count = self.count
+        return bf
+
+    # union: a username in either filter is reported by the result (exactly as if added to one filter)
+    def union(self, other):
+        result = self.copy()
+        result |= other
+        return result
+
+    # intersection: may report more false positives than a filter built from the common usernames
+    def intersection(self, other):
+        result = self.copy()
+        result &= other
+        return result
+
+    __or__ = union
+    __and__ = intersection
+
+    @classmethod
+    def build_parallel(cls, source, workers=None, size=None, hash_count=None, target_fpr=0.01, seed=0):
+        """
+        Build a filter from 'source' on 'workers' processes. Each worker sets the bits of its
+        slice of the input in its own shared-memory block, and the blocks are OR-ed together,
+        so bit arrays are never pickled. Without 'size' the filter is sized with from_fpr.
+        """
+        items = source if isinstance(source, (list, tuple)) else list(source)
+        if size is None:
+            bf = cls.from_fpr(max(len(items), 1), target_fpr, seed=seed)
+        else:
+            bf = cls(size, hash_count or 5, seed)
+        workers = workers or cpu_count()
+        if workers <= 1 or len(items) < workers:
+            bf.add_many(items)
+            return bf
+
+        nbytes = (bf.size + 7) // 8
+        step = -(-len(items) // workers)
+        blocks = [SharedMemory(create=True, size=nbytes) for _ in range(workers)]
+        try:
+            jobs = [(block.name, nbytes, bf.size, bf.hash_count, bf.seed, items[i * step:(i + 1) * step])
+                    for i, block in enumerate(blocks)]
+            with Pool(workers) as pool:
+                pool.map(_build_partial, jobs)
+
+            bits = bf._bytes()
+            for block in blocks:
+                np.bitwise_or(bits, np.ndarray(nbytes, dtype=np.uint8, buffer=block.buf), out=bits)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        bf.count = len(items)
+        return bf
+
+    def save(self, path):
+        """
+        Write the filter to 'path': versioned header followed by the raw bit array
+        """
+        with open(path, 'wb') as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, BLOOM_VERSION, self.hash_count,
+                                      self.size, self.seed, self.count))
+            f.write(memoryview(self.bit_array))
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """
+        Memory-map a filter written by save(). The bits are never copied: pages are loaded
+        lazily by the OS and shared between processes that open the same file.
+        mode="r" is read-only, mode="r+" writes added items straight through to the file
+        (call flush() to persist the item count).
+        """
+        if mode not in ("r", "r+"):
+            raise ValueError(f"mode must be 'r' or 'r+', got {mode!r}")
+        with open(path, 'rb' if mode == "r" else 'r+b') as f:
+            access = mmap.ACCESS_READ if mode == "r" else mmap.ACCESS_WRITE
+            mm = mmap.mmap(f.fileno(), 0, access=access) # the mapping stays valid after the file is closed
+
+        magic, version, hash_count, size, seed, count = BLOOM_HEADER.unpack_from(mm)
+        nbytes = (size + 7) // 8
+        if magic != BLOOM_MAGIC or version != BLOOM_VERSION or len(mm) < BLOOM_HEADER.size + nbytes:
+            mm.close()
+            raise ValueError(f"{path} is not a version {BLOOM_VERSION} Bloom filter file")
+
+        view = memoryview(mm)[BLOOM_HEADER.size:BLOOM_HEADER.size + nbytes]
+        bf = cls._wrap(view, size, hash_count, seed, count) # zero-copy, read-only when mode="r"
+        bf._mmap = mm
+        bf._view = view
+        return bf
+
+    @classmethod
+    def _wrap(cls, buffer, size, hash_count, seed=0, count=0):
+        # Filter whose bits live in an existing buffer (mmap, shared memory) instead of a private bitarray
+        bf = cls.__new__(cls)
+        bf.size = size
+        bf.hash_count = hash_count
+        bf.seed = seed
+        bf.count = count
+        bf.bit_array = bitarray(buffer=buffer, endian='big')
+        bf._mmap = None
+        return bf
+
+    def flush(self):
+        # Persist the item count and dirty pages of a filter opened with mode="r+"
+        if self._mmap is not None and not self.bit_array.readonly:
+            BLOOM_HEADER.pack_into(self._mmap, 0, BLOOM_MAGIC, BLOOM_VERSION, self.hash_count,
+                                   self.size, self.seed, self.count)
+            self._mmap.flush()
+
+    def close(self):
+        # Release the memory map of a filter returned by open()
+        if self._mmap is not None:
+            self.flush()
+            self.bit_array = None
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+
+def _build_partial(job):
+    # Pool worker for BloomFilter.build_parallel: add one slice of the input into a shared-memory block
+    name, nbytes, size, hash_count, seed, items = job
+    block = SharedMemory(name=name)
+    view = block.buf[:nbytes]
+    try:
+        bf = BloomFilter._wrap(view, size, hash_count, seed)
+        bf.add_many(items)
+        del bf # drop the bitarray's buffer export before closing the block
+    finally:
+        view.release()
+        block.close()
+
+# Scalable Bloom filter (Almeida et al.): a chain of BloomFilters that grows as items arrive.
+# Sub-filter i holds initial_capacity * growth^i items at an error rate of
+# target_fpr * (1 - ratio) * ratio^i, so the compounded rate stays below target_fpr.
+class ScalableBloomFilter:
+    def __init__(self, initial_capacity=100000, target_fpr=0.01, growth=2, ratio=0.5, seed=0):
+        self.initial_capacity = initial_capacity
+        self.target_fpr = target_fpr
+        self.growth = growth
+        self.ratio = ratio
+        self.seed = seed
+        self.filters = []
+        self.capacities = []
+        self._grow()
+
+    @classmethod
+    def from_iterable(cls, usernames, chunk_size=None, **kwargs):
+        from data_structures.ingest import ingest
+        sbf = cls(**kwargs)
+        ingest(sbf, usernames, chunk_size)
+        return sbf
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        from data_structures.ingest import read_usernames
+        return cls.from_iterable(read_usernames(path), **kwargs)
+
+    def _grow(self):
+        i = len(self.filters)
+        capacity = self.initial_capacity * self.growth ** i
+        fpr = self.target_fpr * (1 - self.ratio) * self.ratio ** i
+        self.filters.append(BloomFilter.from_fpr(capacity, fpr, seed=self.seed))
+        self.capacities.append(capacity)
+
+    def __len__(self):
+        return sum(bf.count for bf in self.filters)
+
+    def add(self, item):
+        if self.filters[-1].count >= self.capacities[-1]:
+            self._grow()
+        self.filters[-1].add(item)
+
+    def check(self, item):
+        return any(bf.check(item) for bf in self.filters)
+
+    def add_many(self, items):
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        start = 0
+        while start < len(items):
+            room = self.capacities[-1] - self.filters[-1].count
+            if room <= 0:
+                self._grow()
+                continue
+            self.filters[-1].add_many(items[start:start + room])
+            start += room
+
+    def check_many(self, items):
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        found = np.zeros(len(items), dtype=bool)
+        for bf in self.filters:
+            found |= bf.check_many(items)
+        return found
+
+    contains = check
+    contains_many = check_many
+
+    def __contains__(self, item):
+        return self.check(item)
+
+    def memory_usage(self):
+        total = sum(bf.bit_array.nbytes for bf in self.filters)
+        items = len(self)
+        return {"bytes": total, "items": items, "bytes_per_item": total / items if items else 0.0}
+
+    def estimated_fpr(self):
+        # A lookup is a false positive if any sub-filter reports one
+        p_negative = 1.0
+        for bf in self.filters:
+            p_negative *= 1 - bf.estimated_fpr()
+        return 1 - p_negative
 
 def benchmark_bloom_filter(n, number=1000):
     chars = ascii_lowercase + digits
     usernames = [''.join(choice(chars) for _ in range(5)) + str(i) for i in range(n)]
-    bf = BloomFilter(size=n*10, hash_count=5)
+    bf = BloomFilter.from_fpr(n, target_fpr=0.01)
 
-    for name in usernames:
-        bf.add(name)
+    bf.add_many(usernames)
 
     lookups = min(number//2, len(usernames)) # same strategy for every algorithm/data structure
     negative_samples = number - lookups
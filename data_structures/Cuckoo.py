@@ -1,72 +1,493 @@
-import hashlib, random
+import math
+import random
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
 from string import ascii_lowercase, digits
 from random import sample
+import mmh3
+import numpy as np
+
+# array typecode used to store fingerprints of each supported width. Only widths that fill their
+# slot: a 12-bit fingerprint in a 16-bit slot costs as much as a 16-bit one with a higher FPR.
+FINGERPRINT_TYPECODES = {8: 'B', 16: 'H'}
+
+# Snapshot file written by CuckooFilter.save(): header | one section per table (the active one
+# first, then the tables kept by grow(), largest first), each a level header, the fingerprint
+# table (little-endian) and its stash ((fingerprint, bucket) uint64 pairs)
+CUCKOO_MAGIC = b'CKOF'
+CUCKOO_VERSION = 3
+# magic, version, fingerprint bits, bucket size, max kicks, stash size, auto resize, tables,
+# seed, max load factor, crc32 (of the header with this field zeroed, then the rest of the file)
+CUCKOO_HEADER = struct.Struct('<4sHHIIIIIQdI')
+# per table: buckets, count, stashed fingerprints
+CUCKOO_LEVEL = struct.Struct('<QQI')
 
 # Cuckoo Filter 
 class CuckooFilter:
-    def __init__(self, bucket_count=10000, bucket_size=2, max_kicks=500):
-        # Number of buckets in the filter
-        self.bucket_count = bucket_count
+    def __init__(self, bucket_count=10000, bucket_size=2, max_kicks=500, fingerprint_bits=16, seed=0,
+                 stash_size=4, auto_resize=False, max_load_factor=0.95):
+        if fingerprint_bits not in FINGERPRINT_TYPECODES:
+            raise ValueError(f"fingerprint_bits must be one of {sorted(FINGERPRINT_TYPECODES)}")
+        # Number of buckets in the filter, rounded up to a power of two so that
+        # the XOR alternate-bucket trick maps each bucket pair back onto itself
+        self.bucket_count = 1 << max(0, (bucket_count - 1).bit_length())
         # Number of fingerprint slots per bucket
         self.bucket_size = bucket_size
         # Max number of evictions allowed when inserting
         self.max_kicks = max_kicks
-        # Initialize buckets as empty lists
-        self.buckets = [[] for _ in range(bucket_count)]
-
-    def _fingerprint(self, item):
-        # Create a short fingerprint of the item (fixed-size string)
-        # Using SHA-256 then truncating to 32 hex chars
-        # Tried MurmurHash but it was taking too much time
-        h = hashlib.sha256(item.encode()).hexdigest()
-        return h[:32]
-
-    def _hashes(self, fp):
-        # Compute two candidate bucket indices for a fingerprint
-        h1 = int(hashlib.sha256(fp.encode()).hexdigest(), 16) % self.bucket_count
-        h2 = (h1 ^ int(hashlib.sha256(fp.encode()).hexdigest(), 16)) % self.bucket_count
-        return h1, h2
+        self.fingerprint_bits = fingerprint_bits
+        self.seed = seed
+        # Small overflow area for fingerprints left homeless by a failed kick chain: (fp, bucket) pairs
+        self.stash_size = stash_size
+        self.stash = []
+        # Grow (see grow()) when the load factor would exceed max_load_factor or a kick chain fails
+        self.auto_resize = auto_resize
+        self.max_load_factor = max_load_factor
+        # Items in the active table and its stash; len() also counts the tables kept by grow()
+        self.count = 0
+        # Full tables from before each grow(), largest first; lookups and deletes also search them
+        self._older = []
+        # number of kicks needed per successful insert -> number of inserts
+        self.kick_histogram = Counter()
+        # kick chains that ran out of kicks (their last fingerprint went to the stash)
+        self.failed_chains = 0
+        self._index_mask = self.bucket_count - 1
+        self._fp_mask = (1 << fingerprint_bits) - 1
+        # All buckets in one flat array of bucket_count * bucket_size fingerprints.
+        # Bucket i owns slots [i*bucket_size, (i+1)*bucket_size); 0 marks an empty slot
+        # and occupied slots are kept at the front of their bucket.
+        typecode = FINGERPRINT_TYPECODES[fingerprint_bits]
+        self.table = array(typecode, bytes(self.bucket_count * bucket_size * array(typecode).itemsize))
+
+    @classmethod
+    def from_iterable(cls, usernames, expected_items, bucket_size=4, chunk_size=None, auto_resize=True, **kwargs):
+        # Sized for expected_items up front: growing later adds a second table to every lookup (see grow())
+        from data_structures.ingest import ingest
+        max_load_factor = kwargs.get("max_load_factor", 0.95)
+        bucket_count = max(1, math.ceil(expected_items / (bucket_size * max_load_factor)))
+        cf = cls(bucket_count, bucket_size, auto_resize=auto_resize, **kwargs)
+        ingest(cf, usernames, chunk_size)
+        return cf
+
+    @classmethod
+    def from_file(cls, path, expected_items=None, **kwargs):
+        # Without expected_items, a first streaming pass counts the usernames
+        from data_structures.ingest import read_usernames
+        if expected_items is None:
+            expected_items = max(1, sum(1 for _ in read_usernames(path)))
+        return cls.from_iterable(read_usernames(path), expected_items, **kwargs)
+
+    def save(self, path):
+        """
+        Write the filter to 'path': versioned header with the parameters, then every fingerprint
+        table with its stash, all covered by a crc32
+        """
+        parts = []
+        for cf in [self] + self._older:
+            table = cf.table
+            if sys.byteorder == 'big':
+                table = array(table.typecode, table)
+                table.byteswap()
+            parts += [CUCKOO_LEVEL.pack(cf.bucket_count, cf.count, len(cf.stash)), table.tobytes(),
+                      np.array(cf.stash, dtype='<u8').reshape(-1, 2).tobytes()]
+        fields = [CUCKOO_MAGIC, CUCKOO_VERSION, self.fingerprint_bits, self.bucket_size, self.max_kicks,
+                  self.stash_size, self.auto_resize, 1 + len(self._older), self.seed, self.max_load_factor]
+        crc = zlib.crc32(CUCKOO_HEADER.pack(*fields, 0))
+        for part in parts:
+            crc = zlib.crc32(part, crc)
+        with open(path, 'wb') as f:
+            f.write(CUCKOO_HEADER.pack(*fields, crc))
+            for part in parts:
+                f.write(part)
+
+    @classmethod
+    def load(cls, path):
+        # Restore a filter written by save() with one read and one bulk copy per table
+        with open(path, 'rb') as f:
+            data = f.read()
+        fields = CUCKOO_HEADER.unpack_from(data) if len(data) >= CUCKOO_HEADER.size else None
+        if (fields is None or fields[0] != CUCKOO_MAGIC or fields[1] != CUCKOO_VERSION
+                or fields[2] not in FINGERPRINT_TYPECODES):
+            raise ValueError(f"{path} is not a version {CUCKOO_VERSION} cuckoo filter file")
+        (_, _, fingerprint_bits, bucket_size, max_kicks, stash_size, auto_resize, levels,
+         seed, max_load_factor, crc) = fields
+        payload = memoryview(data)[CUCKOO_HEADER.size:]
+        if zlib.crc32(payload, zlib.crc32(CUCKOO_HEADER.pack(*fields[:-1], 0))) != crc:
+            raise ValueError(f"{path} is corrupted or truncated (checksum mismatch)")
+
+        typecode = FINGERPRINT_TYPECODES[fingerprint_bits]
+        filters = []
+        at = 0
+        for _ in range(levels):
+            bucket_count, count, stashed = CUCKOO_LEVEL.unpack_from(payload, at)
+            at += CUCKOO_LEVEL.size
+            table_nbytes = bucket_count * bucket_size * array(typecode).itemsize
+            cf = cls(1, bucket_size, max_kicks, fingerprint_bits, seed, stash_size, False, max_load_factor)
+            cf.bucket_count = bucket_count
+            cf._index_mask = bucket_count - 1
+            cf.table = array(typecode)
+            cf.table.frombytes(payload[at:at + table_nbytes])
+            if sys.byteorder == 'big':
+                cf.table.byteswap()
+            at += table_nbytes
+            stash = np.frombuffer(payload, dtype='<u8', count=2 * stashed, offset=at)
+            cf.stash = [tuple(e) for e in stash.reshape(-1, 2).tolist()]
+            at += 16 * stashed
+            cf.count = count
+            filters.append(cf)
+        if at != len(payload):
+            raise ValueError(f"{path} is truncated")
+        cf = filters[0]
+        cf.auto_resize = bool(auto_resize)
+        cf._older = filters[1:]
+        return cf
+
+    def _fingerprint_index(self, item):
+        # One MurmurHash3 (128-bit) per key: the low half picks the bucket, the high half the fingerprint
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        return (h2 & self._fp_mask) or 1, h1 & self._index_mask
+
+    def _alt_index(self, i, fp):
+        # Alternate bucket = i XOR hash(fp); applying it twice gives back i
+        return (i ^ (fp * 0x5bd1e995)) & self._index_mask
+
+    def _put(self, i, fp):
+        # Store fp in the first empty slot of bucket i
+        start = i * self.bucket_size
+        for j in range(start, start + self.bucket_size):
+            if not self.table[j]:
+                self.table[j] = fp
+                return True
+        return False
+
+    def _remove(self, i, fp):
+        # Remove one copy of fp from bucket i, moving the bucket's last fingerprint into the hole
+        start = i * self.bucket_size
+        bucket = self.table[start:start + self.bucket_size]
+        if fp not in bucket:
+            return False
+        j = start + bucket.index(fp)
+        last = start + self.bucket_size - 1
+        while not self.table[last]:
+            last -= 1
+        self.table[j], self.table[last] = self.table[last], 0
+        return True
+
+    def _in_bucket(self, i, fp):
+        start = i * self.bucket_size
+        return fp in self.table[start:start + self.bucket_size]
+
+    @property
+    def capacity(self):
+        # Slots of the active table (the one inserts go to)
+        return self.bucket_count * self.bucket_size
+
+    @property
+    def load_factor(self):
+        return self.count / self.capacity
+
+    def __len__(self):
+        return self.count + sum(cf.count for cf in self._older)
+
+    def memory_usage(self):
+        # Fingerprint tables plus the stashes
+        total = 0
+        for cf in [self] + self._older:
+            total += sys.getsizeof(cf.table) + sys.getsizeof(cf.stash) + sum(sys.getsizeof(e) for e in cf.stash)
+        items = len(self)
+        return {"bytes": total, "items": items, "bytes_per_item": total / items if items else 0.0}
+
+    def grow(self, expected_items=0):
+        """
+        Send further inserts to a new table with twice the buckets (or room for expected_items).
+        Fingerprints cannot be moved to a bigger table without their keys, so the full table is
+        kept, as in a scalable Bloom filter: lookups and deletes search it after the new one.
+        Every kept table adds its false-positive rate to the filter's, so presize when possible.
+        """
+        if self.count:
+            full = type(self)(1, self.bucket_size, self.max_kicks, self.fingerprint_bits, self.seed,
+                              self.stash_size, False, self.max_load_factor)
+            full.bucket_count, full._index_mask = self.bucket_count, self._index_mask
+            full.table, full.stash, full.count = self.table, self.stash, self.count
+            self._older.insert(0, full)
+        needed = math.ceil(expected_items / (self.bucket_size * self.max_load_factor))
+        self.bucket_count = 1 << (max(2 * self.bucket_count, needed) - 1).bit_length()
+        self._index_mask = self.bucket_count - 1
+        self.table = array(self.table.typecode, bytes(self.bucket_count * self.bucket_size * self.table.itemsize))
+        self.stash = []
+        self.count = 0
+
+    def _drain_stash(self):
+        # Move stashed fingerprints back into the table where there is room again
+        stash, self.stash = self.stash, []
+        for fp, i in stash:
+            if not (self._put(i, fp) or self._put(self._alt_index(i, fp), fp)):
+                self.stash.append((fp, i))
 
     def insert(self, item):
         # Insert an item by placing its fingerprint into one of two buckets
-        fp = self._fingerprint(item)
-        i1, i2 = self._hashes(fp)
+        if self.auto_resize and self.count + 1 > self.max_load_factor * self.capacity:
+            self.grow()
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        return self._insert_fp((h2 & self._fp_mask) or 1, h1)
+
+    def _insert_fp(self, fp, h1):
+        # h1 rather than the bucket: a grow() below changes the bucket mask
+        i1 = h1 & self._index_mask
+        i2 = self._alt_index(i1, fp)
 
         # Try direct insert in either candidate bucket
-        for i in [i1, i2]:
-            if len(self.buckets[i]) < self.bucket_size:
-                self.buckets[i].append(fp)
-                return True
+        if self._put(i1, fp) or self._put(i2, fp):
+            self.count += 1
+            self.kick_histogram[0] += 1
+            return True
+
+        # A kick chain can end with a homeless fingerprint, only start one if the stash can take it
+        if len(self.stash) >= self.stash_size:
+            if not self.auto_resize:
+                return False
+            self.grow()
+            return self._insert_fp(fp, h1)
 
         # If both are full, perform "kicks" (evictions)
         i = random.choice([i1, i2])
-        for _ in range(self.max_kicks):
-            j = random.randint(0, self.bucket_size - 1)
-            fp, self.buckets[i][j] = self.buckets[i][j], fp
-
-            i1, i2 = self._hashes(fp)
-            i = i2 if i == i1 else i1
+        for kicks in range(1, self.max_kicks + 1):
+            j = i * self.bucket_size + random.randint(0, self.bucket_size - 1)
+            fp, self.table[j] = self.table[j], fp
 
-            if len(self.buckets[i]) < self.bucket_size:
-                self.buckets[i].append(fp)
+            i = self._alt_index(i, fp)
+            if self._put(i, fp):
+                self.count += 1
+                self.kick_histogram[kicks] += 1
                 return True
 
-        return False
+        # Kick chain failed: keep the last evicted fingerprint in the stash instead of dropping it
+        self.stash.append((fp, i))
+        self.count += 1
+        self.failed_chains += 1
+        if self.auto_resize:
+            self.grow()
+        return True
+
+    def _batch_hashes(self, items):
+        # (n, 2) uint64 halves of each item's MurmurHash3, the same as mmh3.hash64
+        digests = b''.join([mmh3.hash_bytes(item, self.seed) for item in items])
+        return np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+
+    def _batch_fingerprints(self, h):
+        # Vectorized _fingerprint_index + _alt_index for a batch: (fingerprints, first buckets, second buckets)
+        fp = h[:, 1] & np.uint64(self._fp_mask)
+        fp[fp == 0] = 1
+        i1 = h[:, 0] & np.uint64(self._index_mask)
+        i2 = (i1 ^ (fp * np.uint64(0x5bd1e995))) & np.uint64(self._index_mask)
+        return fp.astype(self.table.typecode), i1.astype(np.intp), i2.astype(np.intp)
+
+    def _buckets(self):
+        # Writable (bucket_count, bucket_size) NumPy view over the fingerprint table
+        return np.frombuffer(self.table, dtype=self.table.typecode).reshape(self.bucket_count, self.bucket_size)
+
+    def _place_many(self, buckets, fps):
+        # Put each fp into the next free slot of its bucket; returns a mask of the ones that fit
+        order = np.argsort(buckets, kind='stable')
+        b = buckets[order]
+        # rank of each item among the batch items headed for the same bucket
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        rank = np.arange(len(b)) - np.repeat(starts, np.diff(np.r_[starts, len(b)]))
+        table = self._buckets()
+        slot = np.count_nonzero(table[b], axis=1) + rank # occupied slots are packed at the front
+        fits = slot < self.bucket_size
+        table[b[fits], slot[fits]] = fps[order[fits]]
+        placed = np.zeros(len(b), dtype=bool)
+        placed[order[fits]] = True
+        return placed
+
+    def insert_many(self, items):
+        """
+        Insert a batch of items. Fingerprints and buckets are computed for the whole batch and
+        placed with array operations; only items whose two buckets are full take the kick loop.
+        Returns the number of items inserted.
+        """
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        if not self.auto_resize:
+            return self._insert_batch(items)
+        # Fill the active table up to max_load_factor, then grow once for the rest of the batch
+        placed = start = 0
+        while start < len(items):
+            room = int(self.max_load_factor * self.capacity) - self.count
+            if room <= 0:
+                self.grow(len(items) - start)
+                continue
+            placed += self._insert_batch(items[start:start + room])
+            start += room
+        return placed
+
+    def _insert_batch(self, items):
+        h = self._batch_hashes(items)
+        fp, i1, i2 = self._batch_fingerprints(h)
+
+        pending = np.arange(len(items))
+        for buckets in (i1, i2):
+            if len(pending):
+                pending = pending[~self._place_many(buckets[pending], fp[pending])]
+        placed = len(items) - len(pending)
+        self.count += placed
+        self.kick_histogram[0] += placed
+
+        for k in pending.tolist():
+            placed += self._insert_fp(int(fp[k]), int(h[k, 0]))
+        return placed
+
+    def _contains_hashed(self, h):
+        fp, i1, i2 = self._batch_fingerprints(h)
+        table = self._buckets()
+        found = (table[i1] == fp[:, None]).any(axis=1) | (table[i2] == fp[:, None]).any(axis=1)
+        for f, i in self.stash:
+            found |= (fp == f) & ((i1 == i) | (i2 == i))
+        return found
+
+    # Check a batch of items, returns a numpy array of bools
+    def contains_many(self, items):
+        h = self._batch_hashes(items)
+        found = self._contains_hashed(h)
+        for cf in self._older:
+            found |= cf._contains_hashed(h)
+        return found
+
+    def _lookup_hashed(self, h1, h2):
+        # lookup() of one table, inlined: with grown filters this runs once per table
+        fp = (h2 & self._fp_mask) or 1
+        mask, size, table = self._index_mask, self.bucket_size, self.table
+        i1 = h1 & mask
+        i2 = (i1 ^ (fp * 0x5bd1e995)) & mask
+        if fp in table[i1 * size:(i1 + 1) * size] or fp in table[i2 * size:(i2 + 1) * size]:
+            return True
+        return bool(self.stash) and any(f == fp and i in (i1, i2) for f, i in self.stash)
 
     # Check if the item exists in the cuckoo filter
     def lookup(self, item):
-        fp = self._fingerprint(item)
-        i1, i2 = self._hashes(fp)
-        return fp in self.buckets[i1] or fp in self.buckets[i2]
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        if self._lookup_hashed(h1, h2):
+            return True
+        for cf in self._older:
+            if cf._lookup_hashed(h1, h2):
+                return True
+        return False
+
+    # Opt-in statistics (see data_structures/stats.py). add()/add_many()/contains() go through
+    # the instrumented insert()/insert_many()/lookup(), so they are counted too.
+    stats = None
+    _COUNTED = {"insert": "_insert_counted", "insert_many": "_insert_many_counted", "lookup": "_lookup_counted"}
+
+    def enable_stats(self, timer=None):
+        from data_structures.stats import OpStats, instrument
+        self.stats = OpStats(timer)
+        instrument(self, self.stats, {name: getattr(self, counted) for name, counted in self._COUNTED.items()})
+        return self.stats
+
+    def disable_stats(self):
+        from data_structures.stats import uninstrument
+        uninstrument(self, self._COUNTED)
+        self.stats = None
+
+    def _insert_counted(self, item):
+        inserted = type(self).insert(self, item)
+        self.stats.count("inserts")
+        self.stats.count("failed_inserts", not inserted)
+        return inserted
+
+    def _insert_many_counted(self, items):
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        placed = type(self).insert_many(self, items)
+        self.stats.count("inserts", len(items))
+        self.stats.count("failed_inserts", len(items) - placed)
+        return placed
+
+    def _lookup_counted(self, item):
+        # lookup() that records the buckets read per lookup (3 per table: both buckets and the stash)
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        probes, found, stash_hit = 0, False, False
+        for cf in [self] + self._older:
+            fp = (h2 & cf._fp_mask) or 1
+            i1 = h1 & cf._index_mask
+            i2 = cf._alt_index(i1, fp)
+            if cf._in_bucket(i1, fp):
+                probes, found = probes + 1, True
+            elif cf._in_bucket(i2, fp):
+                probes, found = probes + 2, True
+            else:
+                probes += 3
+                found = stash_hit = any(f == fp and i in (i1, i2) for f, i in cf.stash)
+            if found:
+                break
+        self.stats.count("lookups")
+        self.stats.count("positives", found)
+        self.stats.count("stash_hits", stash_hit)
+        self.stats.observe("buckets_probed", probes)
+        return found
+
+    def occupancy(self):
+        # Histogram of occupied slots per bucket over all tables: {slots used: buckets}
+        histogram = Counter()
+        for cf in [self] + self._older:
+            used = np.count_nonzero(cf._buckets(), axis=1)
+            values, counts = np.unique(used, return_counts=True)
+            histogram.update(dict(zip(values.tolist(), counts.tolist())))
+        return histogram
+
+    def collect_stats(self):
+        from data_structures.stats import summarize_histogram
+        report = self.stats.summary() if self.stats is not None else {}
+        report["load_factor"] = self.load_factor
+        report["tables"] = 1 + len(self._older)
+        report["stashed"] = len(self.stash) + sum(len(cf.stash) for cf in self._older)
+        report["kicks"] = summarize_histogram(self.kick_histogram)
+        report["failed_kick_chains"] = self.failed_chains
+        report["bucket_occupancy"] = summarize_histogram(self.occupancy())
+        return report
+
+    # Membership protocol names (see data_structures/membership.py)
+    def add(self, item):
+        return self.insert(item)
+
+    def add_many(self, items):
+        return self.insert_many(items)
+
+    def contains(self, item):
+        return self.lookup(item)
+
+    def __contains__(self, item):
+        return self.lookup(item)
+
+    def _delete_hashed(self, h1, h2):
+        fp = (h2 & self._fp_mask) or 1
+        i1 = h1 & self._index_mask
+        i2 = self._alt_index(i1, fp)
+        if self._remove(i1, fp) or self._remove(i2, fp):
+            self.count -= 1
+            self._drain_stash()
+            return True
+        for k, (f, i) in enumerate(self.stash):
+            if f == fp and i in (i1, i2):
+                del self.stash[k]
+                self.count -= 1
+                return True
+        return False
+
+    # Remove an item that was inserted before (deleting a never-inserted item can remove a colliding one)
+    def delete(self, item):
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        return self._delete_hashed(h1, h2) or any(cf._delete_hashed(h1, h2) for cf in self._older)
 
 # Testing the lookup times of different number of usernames
 def benchmark_cuckoo_filter(n, number=1000):
     chars = ascii_lowercase + digits # random username
     usernames = [''.join(random.choice(chars) for _ in range(5)) + str(i) for i in range(n)] # Generate random usernames 
-    cf = CuckooFilter(bucket_count=n*2, bucket_size=4) # Make a cuckoo filter object
+    cf = CuckooFilter(bucket_count=max(1, n // 2), bucket_size=4) # Make a cuckoo filter object (>= 2n slots after rounding)
 
-    for name in usernames:
-        cf.insert(name)
+    cf.insert_many(usernames)
 
     lookups = min(number//2, len(usernames))
     negative_samples = number - lookups
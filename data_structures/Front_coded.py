@@ -0,0 +1,163 @@
+import mmap
+import struct
+import numpy as np
+
+from data_structures.ingest import external_sort, read_usernames
+
+# On-disk sorted username dictionary for the binary search path.
+# Keys are front coded (prefix compressed) in blocks of 'block_size': the first key of a block
+# is stored in full and every other key as (shared prefix length, suffix). The file ends with a
+# fixed-width array of block head keys and the block offsets, both memory-mapped on open, so a
+# lookup binary searches the heads and decodes a single block.
+#
+# Layout: header | blocks | heads (n_blocks * head_width bytes) | offsets (n_blocks + 1 uint64)
+FC_MAGIC = b'FCSD'
+FC_VERSION = 1
+# magic, version, block_size, number of keys, number of blocks, head width, heads offset
+FC_HEADER = struct.Struct('<4sHHQQQQ')
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(buf, pos):
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class FrontCodedDict:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, block_size, count, n_blocks, head_width, heads_offset = FC_HEADER.unpack_from(self._mmap)
+        if magic != FC_MAGIC or version != FC_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FC_VERSION} front-coded dictionary")
+        self.block_size = block_size
+        self.count = count
+        # zero-copy views: only the pages of the heads/offsets that lookups touch get loaded
+        head_width = max(head_width, 1) # build() writes heads as S1 when the only head is ''
+        self.heads = np.frombuffer(self._mmap, dtype=f'S{head_width}', count=n_blocks, offset=heads_offset)
+        offsets_at = heads_offset + n_blocks * head_width
+        offsets_at += -offsets_at % 8
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=n_blocks + 1, offset=offsets_at)
+
+    @classmethod
+    def build(cls, path, sorted_usernames, block_size=32):
+        """
+        Write a dictionary file from an iterator of usernames in sorted order (duplicates are
+        skipped) and open it. Only one block and the block heads are held in memory.
+        """
+        if not 1 <= block_size <= 0xffff:
+            raise ValueError("block_size must be between 1 and 65535")
+        heads, offsets = [], []
+        count = 0
+        prev = None
+        block = bytearray()
+        with open(path, 'wb') as f:
+            f.write(bytes(FC_HEADER.size))
+            pos = FC_HEADER.size
+            for username in sorted_usernames:
+                key = username.encode()
+                if prev is not None and key <= prev:
+                    if key == prev:
+                        continue
+                    raise ValueError(f"usernames are not sorted: {username!r} after {prev.decode()!r}")
+                if count % block_size == 0:
+                    f.write(block)
+                    pos += len(block)
+                    block = bytearray()
+                    heads.append(key)
+                    offsets.append(pos)
+                    _write_varint(block, len(key))
+                    block += key
+                else:
+                    shared = 0
+                    limit = min(len(key), len(prev))
+                    while shared < limit and key[shared] == prev[shared]:
+                        shared += 1
+                    _write_varint(block, shared)
+                    _write_varint(block, len(key) - shared)
+                    block += key[shared:]
+                prev = key
+                count += 1
+            f.write(block)
+            pos += len(block)
+            offsets.append(pos)
+
+            head_width = max((len(h) for h in heads), default=0)
+            heads_offset = pos
+            heads_bytes = np.array(heads, dtype=f'S{max(head_width, 1)}').tobytes() if heads else b''
+            f.write(heads_bytes)
+            f.write(bytes(-(pos + len(heads_bytes)) % 8)) # align the offsets
+            f.write(np.array(offsets, dtype='<u8').tobytes())
+            f.seek(0)
+            f.write(FC_HEADER.pack(FC_MAGIC, FC_VERSION, block_size, count, len(heads), head_width, heads_offset))
+        return cls(path)
+
+    @classmethod
+    def from_iterable(cls, path, usernames, block_size=32, chunk_size=None, tmp_dir=None):
+        # Unsorted usernames: external merge sort straight into build(), one chunk in memory
+        return cls.build(path, external_sort(usernames, chunk_size, tmp_dir), block_size)
+
+    @classmethod
+    def from_file(cls, path, source_path, **kwargs):
+        return cls.from_iterable(path, read_usernames(source_path), **kwargs)
+
+    def _block(self, b):
+        # Decode block b into its keys (bytes)
+        buf = self._mmap
+        pos, end = int(self.offsets[b]), int(self.offsets[b + 1])
+        length, pos = _read_varint(buf, pos)
+        key = buf[pos:pos + length]
+        pos += length
+        keys = [key]
+        while pos < end:
+            shared, pos = _read_varint(buf, pos)
+            length, pos = _read_varint(buf, pos)
+            key = key[:shared] + buf[pos:pos + length]
+            pos += length
+            keys.append(key)
+        return keys
+
+    def contains(self, username):
+        key = username.encode()
+        b = int(np.searchsorted(self.heads, key, side='right')) - 1 # last block whose head <= key
+        if b < 0:
+            return False
+        buf = self._mmap
+        pos, end = int(self.offsets[b]), int(self.offsets[b + 1])
+        length, pos = _read_varint(buf, pos)
+        current = buf[pos:pos + length]
+        pos += length
+        while current < key and pos < end: # keys are sorted, stop at the first key >= target
+            shared, pos = _read_varint(buf, pos)
+            length, pos = _read_varint(buf, pos)
+            current = current[:shared] + buf[pos:pos + length]
+            pos += length
+        return current == key
+
+    def __contains__(self, username):
+        return self.contains(username)
+
+    def contains_many(self, usernames):
+        return np.array([self.contains(u) for u in usernames], dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for b in range(len(self.heads)):
+            for key in self._block(b):
+                yield key.decode()
+
+    def close(self):
+        self.heads = self.offsets = None # drop the buffer exports before unmapping
+        self._mmap.close()
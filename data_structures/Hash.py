@@ -1,30 +1,497 @@
+import mmap
+import struct
+import sys
+import zlib
 import mmh3
+import numpy as np
+from array import array
+from collections import Counter
 from random import choice, sample
 from string import ascii_lowercase, digits
 
+# Snapshot file written by HashTable.save():
+# header | bucket offsets ((buckets + 1) uint64) | key lengths (count uint32) | key blob (UTF-8)
+# Keys are grouped by bucket (mmh3.hash(key) % buckets, as in the chaining engine), so a
+# FrozenHashTable answers lookups straight from the memory-mapped file.
+HASH_MAGIC = b'HTBL'
+HASH_VERSION = 2
+# magic, version, reserved, number of buckets, number of keys, max load factor, blob bytes,
+# crc32 (of the header with this field zeroed, then the rest of the file), padding
+HASH_HEADER = struct.Struct('<4sHHQQdQII')
+
 # Simple hash table using MurmurHash3 + chaining
 # Using MurmurHash3 for hashing. It is non-cryptographic so it's faster and security is not needed for this assignment's purpose.
 # Tried SHA-256 but it was taking too long
+# HashTable(engine="open") gives the open-addressing engine below instead of chaining.
 class HashTable:
-    def __init__(self, size=10**6):
-        # Initialize table with empty lists for chaining
+    def __new__(cls, *args, engine="chaining", **kwargs):
+        if engine not in ("chaining", "open"):
+            raise ValueError(f"engine must be 'chaining' or 'open', got {engine!r}")
+        if cls is HashTable and engine == "open":
+            cls = OpenAddressingHashTable
+        return super().__new__(cls)
+
+    # Buckets moved from the old to the new table per operation while a rehash is in progress
+    REHASH_STEP = 8
+
+    def __init__(self, size=10**6, engine="chaining", max_load_factor=1.0):
+        # Chains are created on first use: table[i] holds the keys of bucket i (or None)
+        # and values[i] the matching values
         self.size = size
-        self.table = [[] for _ in range(size)]
+        self.max_load_factor = max_load_factor
+        self.count = 0
+        self.table = [None] * size
+        self.values = [None] * size
+        # While growing, the previous (table, values) pair is drained a few buckets per operation
+        self._old = None
+        self._rehash_pos = 0
+
+    @classmethod
+    def from_iterable(cls, usernames, size=1 << 16, chunk_size=None, **kwargs):
+        # Starts at 'size' buckets and grows as usernames stream in, one chunk at a time
+        from data_structures.ingest import ingest
+        table = cls(size, **kwargs)
+        ingest(table, usernames, chunk_size)
+        return table
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        from data_structures.ingest import read_usernames
+        return cls.from_iterable(read_usernames(path), **kwargs)
 
     def _hash(self, key):
         # Compute hash index using MurmurHash3
         return mmh3.hash(key) % self.size
 
+    def _find(self, key, h):
+        # (key chain, value chain, position) holding key in the new or old table, or None
+        idx = h % self.size
+        chain = self.table[idx]
+        if chain is not None and key in chain:
+            return chain, self.values[idx], chain.index(key)
+        if self._old is not None:
+            old_table, old_values = self._old
+            idx = h % len(old_table)
+            chain = old_table[idx]
+            if chain is not None and key in chain:
+                return chain, old_values[idx], chain.index(key)
+        return None
+
+    def _append(self, key, value, h):
+        idx = h % self.size
+        if self.table[idx] is None:
+            self.table[idx], self.values[idx] = [], []
+        self.table[idx].append(key)
+        self.values[idx].append(value)
+
+    def _grow(self):
+        # Start an incremental rehash into a table twice the size
+        while self._old is not None: # a previous rehash must be finished first
+            self._rehash_step()
+        self._old = (self.table, self.values)
+        self._rehash_pos = 0
+        self.size *= 2
+        self.table = [None] * self.size
+        self.values = [None] * self.size
+
+    def _rehash_step(self):
+        # Move the next REHASH_STEP buckets of the old table into the new one
+        old_table, old_values = self._old
+        end = min(self._rehash_pos + self.REHASH_STEP, len(old_table))
+        for j in range(self._rehash_pos, end):
+            chain = old_table[j]
+            if chain is not None:
+                for key, value in zip(chain, old_values[j]):
+                    self._append(key, value, mmh3.hash(key))
+                old_table[j] = old_values[j] = None
+        self._rehash_pos = end
+        if end == len(old_table):
+            self._old = None
+
+    def _put(self, key, value, replace):
+        if self._old is not None:
+            self._rehash_step()
+        h = mmh3.hash(key)
+        found = self._find(key, h)
+        if found is not None:
+            if replace:
+                _, values, pos = found
+                values[pos] = value
+            return
+        self._append(key, value, h)
+        self.count += 1
+        if self.count > self.max_load_factor * self.size:
+            self._grow()
+
     def insert(self, key):
         # Insert key if not already present in the chain
-        idx = self._hash(key)
-        if key not in self.table[idx]:
-            self.table[idx].append(key)
+        self._put(key, None, replace=False)
+
+    def put(self, key, value):
+        # Map key to value, replacing any previous value
+        self._put(key, value, replace=True)
+
+    def get(self, key, default=None):
+        if self._old is not None:
+            self._rehash_step()
+        found = self._find(key, mmh3.hash(key))
+        if found is None:
+            return default
+        _, values, pos = found
+        return values[pos]
 
     def contains(self, key):
         # Check if key exists in the hash table
-        idx = self._hash(key)
-        return key in self.table[idx]
+        if self._old is not None:
+            self._rehash_step()
+        return self._find(key, mmh3.hash(key)) is not None
+
+    def delete(self, key):
+        # Remove key and its value, returns False if key was not present
+        if self._old is not None:
+            self._rehash_step()
+        found = self._find(key, mmh3.hash(key))
+        if found is None:
+            return False
+        keys, values, pos = found
+        del keys[pos], values[pos]
+        self.count -= 1
+        return True
+
+    # Membership protocol names (see data_structures/membership.py)
+    def add(self, key):
+        self.insert(key)
+
+    def contains_many(self, keys):
+        return np.fromiter((self.contains(k) for k in keys), dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def __iter__(self):
+        # Keys in table order (not safe to mutate the table while iterating)
+        tables = [self.table] if self._old is None else [self._old[0], self.table]
+        for table in tables:
+            for chain in table:
+                if chain:
+                    yield from chain
+
+    def memory_usage(self):
+        """
+        Deep size of the table in bytes: bucket arrays, chains and keys (values are counted
+        with their shallow size). Returns {"bytes", "items", "bytes_per_item"}.
+        """
+        tables = [(self.table, self.values)] if self._old is None else [self._old, (self.table, self.values)]
+        total = 0
+        for table, values in tables:
+            total += sys.getsizeof(table) + sys.getsizeof(values)
+            for chain, vals in zip(table, values):
+                if chain is not None:
+                    total += sys.getsizeof(chain) + sys.getsizeof(vals)
+                    total += sum(sys.getsizeof(k) for k in chain)
+                    total += sum(sys.getsizeof(v) for v in vals if v is not None)
+        return {"bytes": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
+
+    def items(self):
+        tables = [(self.table, self.values)] if self._old is None else [self._old, (self.table, self.values)]
+        for table, values in tables:
+            for chain, vals in zip(table, values):
+                if chain:
+                    yield from zip(chain, vals)
+
+    # Opt-in statistics (see data_structures/stats.py): counting versions of these methods
+    # shadow the class methods while stats are enabled
+    stats = None
+    _COUNTED = {"contains": "_contains_counted", "insert": "_insert_counted"}
+
+    def enable_stats(self, timer=None):
+        from data_structures.stats import OpStats, instrument
+        self.stats = OpStats(timer)
+        instrument(self, self.stats, {name: getattr(self, counted) for name, counted in self._COUNTED.items()})
+        return self.stats
+
+    def disable_stats(self):
+        from data_structures.stats import uninstrument
+        uninstrument(self, self._COUNTED)
+        self.stats = None
+
+    def _contains_counted(self, key):
+        # contains() that records the keys compared per lookup ("probes")
+        if self._old is not None:
+            self._rehash_step()
+        h = mmh3.hash(key)
+        tables = [self.table] if self._old is None else [self.table, self._old[0]]
+        probes, found = 0, False
+        for table in tables:
+            chain = table[h % len(table)]
+            if chain:
+                if key in chain:
+                    probes += chain.index(key) + 1
+                    found = True
+                    break
+                probes += len(chain)
+        self.stats.count("lookups")
+        self.stats.count("hits", found)
+        self.stats.observe("probes", probes)
+        return found
+
+    def _insert_counted(self, key):
+        size = self.size
+        type(self).insert(self, key)
+        self.stats.count("inserts")
+        self.stats.count("resizes", self.size != size)
+
+    def occupancy(self):
+        # Histogram of chain lengths over the buckets of the current table: {length: buckets}
+        return Counter(len(chain) if chain else 0 for chain in self.table)
+
+    def collect_stats(self):
+        from data_structures.stats import summarize_histogram
+        report = self.stats.summary() if self.stats is not None else {}
+        report["load_factor"] = self.count / self.size
+        report["chain_length"] = summarize_histogram(self.occupancy())
+        return report
+
+    def save(self, path):
+        """
+        Write the keys to 'path' in the versioned, checksummed snapshot format (either engine).
+        Only membership is stored: tables holding put() values are rejected.
+        """
+        keys, hashes = [], []
+        for key, value in self.items():
+            if value is not None:
+                raise ValueError("save() stores keys only, but the table holds values")
+            keys.append(key.encode())
+            hashes.append(mmh3.hash(key))
+        bucket_count = max(1, len(keys))
+        buckets = np.array(hashes, dtype=np.int64) % bucket_count
+        order = np.argsort(buckets, kind='stable')
+        offsets = np.searchsorted(buckets[order], np.arange(bucket_count + 1)).astype('<u8')
+        keys = [keys[i] for i in order.tolist()]
+        lengths = np.fromiter(map(len, keys), dtype='<u4', count=len(keys))
+        payload = [offsets.tobytes(), lengths.tobytes(), b''.join(keys)]
+        fields = [HASH_MAGIC, HASH_VERSION, 0, bucket_count, len(keys), self.max_load_factor, len(payload[2])]
+        crc = zlib.crc32(HASH_HEADER.pack(*fields, 0, 0))
+        for part in payload:
+            crc = zlib.crc32(part, crc)
+        with open(path, 'wb') as f:
+            f.write(HASH_HEADER.pack(*fields, crc, 0))
+            for part in payload:
+                f.write(part)
+
+    @classmethod
+    def load(cls, path, verify=True):
+        # Memory-mapped, read-only FrozenHashTable over a snapshot; thaw() it to modify
+        return FrozenHashTable(path, verify)
+
+# Open addressing with linear probing. Keys sit in one flat list next to a flat array of their
+# cached 64-bit hashes (0 = empty slot), so probes compare integers before strings and growing
+# the table never rehashes a key. Starts small and doubles past max_load_factor, so memory
+# follows the number of stored keys; deletes use backward shifting, so there are no tombstones.
+# Unlike the chaining engine, growing is a single (cheap, hash-cached) rehash, not an incremental one.
+class OpenAddressingHashTable(HashTable):
+    def __init__(self, size=8, engine="open", max_load_factor=0.7):
+        # 'size' is only the initial number of slots (rounded up to a power of two)
+        if not 0 < max_load_factor < 1:
+            # a full table has no empty slot to end a missing key's probe sequence
+            raise ValueError(f"max_load_factor must be between 0 and 1 (exclusive), got {max_load_factor!r}")
+        self.max_load_factor = max_load_factor
+        self.count = 0
+        self._allocate(1 << max(3, (size - 1).bit_length()))
+
+    def _allocate(self, size):
+        self.size = size
+        self._mask = size - 1
+        self.hashes = array('Q', bytes(8 * size))
+        self.keys = [None] * size
+        self.values = [None] * size
+
+    def _hash(self, key):
+        return mmh3.hash64(key, signed=False)[0] or 1
+
+    def _find(self, key, h):
+        # Slot holding key, or the empty slot that ends its probe sequence
+        hashes, keys, mask = self.hashes, self.keys, self._mask
+        i = h & mask
+        while hashes[i]:
+            if hashes[i] == h and keys[i] == key:
+                return i
+            i = (i + 1) & mask
+        return i
+
+    def _resize(self, size):
+        old_hashes, old_keys, old_values = self.hashes, self.keys, self.values
+        self._allocate(size)
+        hashes, keys, values, mask = self.hashes, self.keys, self.values, self._mask
+        for h, key, value in zip(old_hashes, old_keys, old_values):
+            if h:
+                i = h & mask
+                while hashes[i]:
+                    i = (i + 1) & mask
+                hashes[i], keys[i], values[i] = h, key, value
+
+    def _put(self, key, value, replace):
+        h = self._hash(key)
+        i = self._find(key, h)
+        if self.hashes[i]:
+            if replace:
+                self.values[i] = value
+            return
+        if self.count + 1 > self.max_load_factor * self.size:
+            self._resize(self.size * 2)
+            i = self._find(key, h)
+        self.hashes[i], self.keys[i], self.values[i] = h, key, value
+        self.count += 1
+
+    def get(self, key, default=None):
+        i = self._find(key, self._hash(key))
+        return self.values[i] if self.hashes[i] else default
+
+    def contains(self, key):
+        h = self._hash(key)
+        return self.hashes[self._find(key, h)] != 0
+
+    def __iter__(self):
+        for h, key in zip(self.hashes, self.keys):
+            if h:
+                yield key
+
+    def memory_usage(self):
+        # Deep size: hash array, key/value slot lists, keys and (shallow) values
+        total = sys.getsizeof(self.hashes) + sys.getsizeof(self.keys) + sys.getsizeof(self.values)
+        total += sum(sys.getsizeof(k) for k in self.keys if k is not None)
+        total += sum(sys.getsizeof(v) for v in self.values if v is not None)
+        return {"bytes": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
+
+    def items(self):
+        for h, key, value in zip(self.hashes, self.keys, self.values):
+            if h:
+                yield key, value
+
+    def _contains_counted(self, key):
+        # contains() that records the slots visited per lookup ("probes")
+        hashes, keys, mask = self.hashes, self.keys, self._mask
+        h = self._hash(key)
+        i = h & mask
+        probes = 1
+        while hashes[i] and not (hashes[i] == h and keys[i] == key):
+            i = (i + 1) & mask
+            probes += 1
+        found = hashes[i] != 0
+        self.stats.count("lookups")
+        self.stats.count("hits", found)
+        self.stats.observe("probes", probes)
+        return found
+
+    def occupancy(self):
+        # Histogram of how far stored keys sit from their home slot: {displacement: keys}
+        hashes = np.frombuffer(self.hashes, dtype=np.uint64)
+        slots = np.flatnonzero(hashes)
+        displacement = (slots - (hashes[slots] & np.uint64(self._mask)).astype(np.int64)) & self._mask
+        del hashes # release the buffer export
+        values, counts = np.unique(displacement, return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+    def collect_stats(self):
+        from data_structures.stats import summarize_histogram
+        report = self.stats.summary() if self.stats is not None else {}
+        report["load_factor"] = self.count / self.size
+        report["displacement"] = summarize_histogram(self.occupancy())
+        return report
+
+    def delete(self, key):
+        # Backward-shift deletion: pull later entries of the cluster into the hole
+        hashes, keys, values, mask = self.hashes, self.keys, self.values, self._mask
+        i = self._find(key, self._hash(key))
+        if not hashes[i]:
+            return False
+        j = i
+        while True:
+            j = (j + 1) & mask
+            if not hashes[j]:
+                break
+            home = hashes[j] & mask
+            # entry j may move to i only if its home slot is not cyclically in (i, j]
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):
+                hashes[i], keys[i], values[i] = hashes[j], keys[j], values[j]
+                i = j
+        hashes[i], keys[i], values[i] = 0, None, None
+        self.count -= 1
+        return True
+
+class FrozenHashTable:
+    """
+    Read-only view of a HashTable snapshot. Opening maps the file and wraps the bucket offsets
+    and key lengths as NumPy arrays: there is no per-key work, pages load as lookups touch them.
+    """
+    def __init__(self, path, verify=True):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, bucket_count, count, max_load_factor, blob_nbytes, crc, _ = HASH_HEADER.unpack_from(self._mmap)
+        lengths_at = HASH_HEADER.size + (bucket_count + 1) * 8
+        blob_at = lengths_at + count * 4
+        if magic != HASH_MAGIC or version != HASH_VERSION or len(self._mmap) != blob_at + blob_nbytes:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {HASH_VERSION} hash table snapshot")
+        header = HASH_HEADER.pack(magic, version, 0, bucket_count, count, max_load_factor, blob_nbytes, 0, 0)
+        if verify and zlib.crc32(memoryview(self._mmap)[HASH_HEADER.size:], zlib.crc32(header)) != crc:
+            self._mmap.close()
+            raise ValueError(f"{path} is corrupted (checksum mismatch)")
+        self.bucket_count = bucket_count
+        self.count = count
+        self.max_load_factor = max_load_factor
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=bucket_count + 1, offset=HASH_HEADER.size)
+        # key j is blob[ends[j] - lengths[j]:ends[j]]
+        self.lengths = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=lengths_at)
+        self.ends = blob_at + np.cumsum(self.lengths, dtype=np.int64)
+
+    def contains(self, key):
+        b = mmh3.hash(key) % self.bucket_count
+        encoded = key.encode()
+        size = len(encoded)
+        mm, lengths, ends = self._mmap, self.lengths, self.ends
+        for j in range(int(self.offsets[b]), int(self.offsets[b + 1])):
+            if lengths[j] == size:
+                end = int(ends[j])
+                if mm[end - size:end] == encoded:
+                    return True
+        return False
+
+    def __contains__(self, key):
+        return self.contains(key)
+
+    def contains_many(self, keys):
+        return np.fromiter((self.contains(k) for k in keys), dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        mm = self._mmap
+        for end, size in zip(self.ends.tolist(), self.lengths.tolist()):
+            yield mm[end - size:end].decode()
+
+    def memory_usage(self):
+        # The mapped file plus the key end positions computed on open
+        total = len(self._mmap) + self.ends.nbytes
+        return {"bytes": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
+
+    def thaw(self, engine="chaining"):
+        # Mutable HashTable with the same keys (this is the per-key rebuild load() avoids)
+        if engine == "chaining":
+            table = HashTable(max(1, int(self.count / self.max_load_factor) + 1), max_load_factor=self.max_load_factor)
+        else:
+            table = HashTable(engine=engine)
+        for key in self:
+            table.insert(key)
+        return table
+
+    def close(self):
+        self.offsets = self.lengths = None # drop the buffer exports before unmapping
+        self._mmap.close()
 
 def benchmark_hash_table(n, number=1000):
     """
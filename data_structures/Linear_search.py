@@ -1,18 +1,190 @@
 # Import necessary libraries
 from random import choice, sample
 from string import ascii_lowercase, digits
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
 
 chars = ascii_lowercase + digits # random usernames
 
-def linear_search(lst, target):
+def linear_search(lst, target, stats=None):
     """
     Simple linear search: returns True if target is in lst
+    (pass an OpStats as 'stats' to record the comparisons made)
     """
+    if stats is not None:
+        return _linear_search_counted(lst, target, stats)
     for item in lst:
         if item == target:
             return True # when found, break
     return False
 
+def _linear_search_counted(lst, target, stats):
+    comparisons, found = 0, False
+    for item in lst:
+        comparisons += 1
+        if item == target:
+            found = True
+            break
+    stats.count("lookups")
+    stats.count("hits", found)
+    stats.observe("comparisons", comparisons)
+    return found
+
+def _scan_chunks(data, targets, found, start, end, chunk_size):
+    """
+    Scan data[start:end] chunk by chunk for the sorted, unique 'targets', setting found[i]
+    when targets[i] is seen. Each chunk is matched with one vectorized searchsorted against
+    the (small) target array; stops as soon as every target has been found.
+    """
+    last = len(targets) - 1
+    for lo in range(start, end, chunk_size):
+        if found.all():
+            break
+        chunk = data[lo:min(lo + chunk_size, end)]
+        pos = np.minimum(np.searchsorted(targets, chunk), last)
+        found[pos[targets[pos] == chunk]] = 1
+
+def _scan_worker(job):
+    # Pool worker: attach to the shared usernames and found flags, scan one slice
+    data_name, n, dtype, found_name, targets, start, end, chunk_size = job
+    data_block, found_block = SharedMemory(name=data_name), SharedMemory(name=found_name)
+    try:
+        data = np.ndarray(n, dtype=dtype, buffer=data_block.buf)
+        found = np.ndarray(len(targets), dtype=np.uint8, buffer=found_block.buf)
+        _scan_chunks(data, targets, found, start, end, chunk_size)
+        del data, found # release the buffer exports before closing
+    finally:
+        data_block.close()
+        found_block.close()
+
+class ScanEngine:
+    """
+    Linear scan over usernames packed into one fixed-width NumPy bytes array.
+    A batch of targets is matched in a single pass over the array (chunk by chunk, stopping
+    early once every target is found), optionally split across worker processes that read
+    the array from shared memory. Also answers prefix and substring predicates.
+    """
+    def __init__(self, usernames, chunk_size=1 << 16):
+        # Also takes an 'S' array of encoded usernames as is
+        if isinstance(usernames, np.ndarray) and usernames.dtype.kind == 'S':
+            self.data = usernames
+        else:
+            self.data = np.array([u.encode() for u in usernames], dtype='S')
+        self.chunk_size = chunk_size
+        self._shm = None
+        self._pool = None
+
+    @classmethod
+    def from_iterable(cls, usernames, chunk_size=1 << 16, count=None, width=None):
+        """
+        Encode one chunk at a time into the username array. With 'count' and 'width' (bytes of
+        the longest encoded username) known, the array is allocated once at its final size;
+        otherwise it doubles as needed (resized in place) and is trimmed at the end.
+        """
+        from data_structures.ingest import chunked
+        data = np.empty(count or chunk_size, dtype=f'S{max(width or 1, 1)}')
+        n = 0
+        for chunk in chunked(usernames, chunk_size):
+            encoded = np.array([u.encode() for u in chunk], dtype='S')
+            if encoded.itemsize > data.itemsize:
+                data = data.astype(encoded.dtype)
+            if n + len(encoded) > len(data):
+                data.resize(max(2 * len(data), n + len(encoded)), refcheck=False)
+            data[n:n + len(encoded)] = encoded
+            n += len(encoded)
+        if n != len(data):
+            data.resize(n, refcheck=False)
+        return cls(data, chunk_size)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        # A first streaming pass finds the count and width, so the array is filled in place
+        from data_structures.ingest import read_usernames
+        count = width = 0
+        for username in read_usernames(path):
+            count += 1
+            width = max(width, len(username.encode()))
+        return cls.from_iterable(read_usernames(path), count=count, width=width, **kwargs)
+
+    def __len__(self):
+        return len(self.data)
+
+    def memory_usage(self):
+        total = self.data.nbytes
+        n = len(self.data)
+        return {"bytes": total, "items": n, "bytes_per_item": total / n if n else 0.0}
+
+    def contains(self, username):
+        return bool((self.data == username.encode()).any())
+
+    def __contains__(self, username):
+        return self.contains(username)
+
+    def contains_many(self, usernames, workers=1):
+        # Batch membership, returns a numpy array of bools
+        queries = np.array([u.encode() for u in usernames], dtype='S')
+        if len(queries) == 0:
+            return np.zeros(0, dtype=bool)
+        targets, inverse = np.unique(queries, return_inverse=True)
+        n = len(self.data)
+        if workers > 1 and n >= workers * self.chunk_size:
+            found = self._contains_parallel(targets, workers)
+        else:
+            found = np.zeros(len(targets), dtype=np.uint8)
+            _scan_chunks(self.data, targets, found, 0, n, self.chunk_size)
+        return found.astype(bool)[inverse]
+
+    def _contains_parallel(self, targets, workers):
+        if self._shm is None:
+            # move the packed array into shared memory once; workers attach to it by name
+            self._shm = SharedMemory(create=True, size=max(self.data.nbytes, 1))
+            shared = np.ndarray(self.data.shape, dtype=self.data.dtype, buffer=self._shm.buf)
+            shared[:] = self.data
+            self.data = shared
+        if self._pool is None or self._pool._processes != workers:
+            self.close_pool()
+            self._pool = Pool(workers)
+
+        n = len(self.data)
+        found_block = SharedMemory(create=True, size=len(targets))
+        try:
+            found = np.ndarray(len(targets), dtype=np.uint8, buffer=found_block.buf)
+            found[:] = 0
+            step = -(-n // workers)
+            jobs = [(self._shm.name, n, self.data.dtype.str, found_block.name, targets,
+                     lo, min(lo + step, n), self.chunk_size) for lo in range(0, n, step)]
+            self._pool.map(_scan_worker, jobs)
+            result = found.copy()
+            del found
+        finally:
+            found_block.close()
+            found_block.unlink()
+        return result
+
+    def prefix(self, prefix):
+        # All usernames starting with 'prefix', in stored order
+        return [u.decode() for u in self.data[np.char.startswith(self.data, prefix.encode())]]
+
+    def substring(self, part):
+        # All usernames containing 'part', in stored order
+        return [u.decode() for u in self.data[np.char.find(self.data, part.encode()) >= 0]]
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def close(self):
+        # Stop the workers and free the shared copy of the usernames
+        self.close_pool()
+        if self._shm is not None:
+            self.data = self.data.copy()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
 def benchmark_linear_search(n, number=1000):
     """
     Generate 'n' usernames, perform 'number' lookups (half existing, half random that may not be present within the list)
@@ -0,0 +1,246 @@
+import mmap
+import struct
+import time
+import zlib
+from random import choice, sample
+from string import ascii_lowercase, digits
+import mmh3
+import numpy as np
+
+# XOR filter (Graf & Lemire) for static username sets, e.g. reserved or banned names.
+# Every key maps to one slot in each of three blocks of a fingerprint table; the table is
+# filled so that the XOR of a key's three slots equals the key's fingerprint. A lookup is one
+# hash and exactly three table reads; 8-bit fingerprints take ~9.8 bits per key at a false
+# positive rate of ~1/256 (16-bit: ~19.7 bits per key, ~1/65536). Keys cannot be added later.
+
+# On-disk layout: little-endian header followed by the fingerprint table
+# magic, version, fingerprint bits, seed, block length, key count,
+# crc32 (of the header with this field zeroed, then the table)
+XOR_MAGIC = b'XORF'
+XOR_VERSION = 2
+XOR_HEADER = struct.Struct('<4sHHQQQI4x')
+FINGERPRINT_DTYPES = {8: np.uint8, 16: np.uint16}
+MAX_ATTEMPTS = 64 # construction retries with a new seed (each fails with probability ~0.1)
+
+def _key_hashes(items, seed):
+    # (n, 2) uint64 halves of each key's 128-bit MurmurHash3, equal to mmh3.hash64(item, seed, signed=False)
+    return np.frombuffer(b''.join([mmh3.hash_bytes(item, seed) for item in items]), dtype='<u8').reshape(-1, 2)
+
+def _distinct(hashes):
+    # Drop repeated usernames (equal 128-bit hashes); sorting on both halves is much faster than np.unique(axis=0)
+    hashes = hashes[np.lexsort((hashes[:, 1], hashes[:, 0]))]
+    keep = np.ones(len(hashes), dtype=bool)
+    keep[1:] = (hashes[1:] != hashes[:-1]).any(axis=1)
+    return hashes[keep]
+
+def _chunked_hashes(usernames, seed, chunk_size=None):
+    from data_structures.ingest import chunked
+    parts = [_key_hashes(chunk, seed) for chunk in chunked(usernames, chunk_size)]
+    return np.concatenate(parts) if parts else np.zeros((0, 2), dtype='<u8')
+
+class XorFilter:
+    def __init__(self, fingerprints, block_length, count, fingerprint_bits=8, seed=0):
+        # Use build() / from_iterable() / load(); this wraps an already filled table
+        self.fingerprints = fingerprints
+        self.block_length = block_length
+        self.count = count
+        self.fingerprint_bits = fingerprint_bits
+        self.seed = seed
+        self._fp_mask = (1 << fingerprint_bits) - 1
+        self._table = memoryview(fingerprints) # plain-int indexing for the scalar path
+        self._mmap = None
+
+    @classmethod
+    def build(cls, usernames, fingerprint_bits=8, seed=0):
+        """
+        Build the filter in one pass over 'usernames' (duplicates are fine).
+        Raises RuntimeError if no seed out of MAX_ATTEMPTS gives a peelable key set.
+        """
+        return cls._build(lambda s: _key_hashes(usernames, s), fingerprint_bits, seed)
+
+    @classmethod
+    def from_iterable(cls, usernames, fingerprint_bits=8, seed=0, chunk_size=None):
+        """
+        Build from usernames hashed one chunk at a time, keeping only 16 bytes per username.
+        A retry with another seed needs a second pass, so a one-shot iterator raises
+        RuntimeError in that (rare) case; a list or from_file() can always be re-read.
+        """
+        passes = 0
+        def hashes(s):
+            nonlocal passes
+            if passes and iter(usernames) is usernames:
+                raise RuntimeError("XOR filter construction needs another pass over the usernames")
+            passes += 1
+            return _chunked_hashes(usernames, s, chunk_size)
+        return cls._build(hashes, fingerprint_bits, seed)
+
+    @classmethod
+    def from_file(cls, path, fingerprint_bits=8, seed=0, chunk_size=None):
+        from data_structures.ingest import read_usernames
+        return cls._build(lambda s: _chunked_hashes(read_usernames(path), s, chunk_size), fingerprint_bits, seed)
+
+    @classmethod
+    def _build(cls, hash_keys, fingerprint_bits, seed):
+        if fingerprint_bits not in FINGERPRINT_DTYPES:
+            raise ValueError(f"fingerprint_bits must be one of {sorted(FINGERPRINT_DTYPES)}")
+        for attempt in range(MAX_ATTEMPTS):
+            hashes = _distinct(hash_keys(seed + attempt))
+            n = len(hashes)
+            block_length = (int(1.23 * n) + 32) // 3
+            slots, fps = cls._slots(hashes, block_length, fingerprint_bits)
+            fingerprints = cls._assign(slots, fps, 3 * block_length, fingerprint_bits)
+            if fingerprints is not None:
+                return cls(fingerprints, block_length, n, fingerprint_bits, seed + attempt)
+        raise RuntimeError(f"could not build an XOR filter in {MAX_ATTEMPTS} attempts")
+
+    @staticmethod
+    def _slots(hashes, block_length, fingerprint_bits):
+        # (n, 3) table slots (one per block) and the fingerprint of every key
+        h1, h2 = hashes[:, 0], hashes[:, 1]
+        low = np.uint64(0xffffffff)
+        slots = np.empty((len(hashes), 3), dtype=np.int64)
+        slots[:, 0] = (h1 & low) % np.uint64(block_length)
+        slots[:, 1] = block_length + (h1 >> np.uint64(32)) % np.uint64(block_length)
+        slots[:, 2] = 2 * block_length + (h2 & low) % np.uint64(block_length)
+        fps = (h2 >> np.uint64(32)) & np.uint64((1 << fingerprint_bits) - 1)
+        return slots, fps.astype(FINGERPRINT_DTYPES[fingerprint_bits])
+
+    @staticmethod
+    def _assign(slots, fps, size, fingerprint_bits):
+        """
+        Peel the 3-hypergraph of keys in rounds: every slot used by exactly one remaining key
+        frees that key, and all keys freed in a round are removed at once. Fingerprints are then
+        assigned round by round in reverse order. Returns the table, or None if peeling gets stuck.
+        """
+        n = len(slots)
+        keys = np.arange(n, dtype=np.int64)
+        degree = np.bincount(slots.ravel(), minlength=size)
+        xor_keys = np.zeros(size, dtype=np.int64) # XOR of the keys still using each slot
+        np.bitwise_xor.at(xor_keys, slots.ravel(), np.repeat(keys, 3))
+        rounds = [] # (keys, the slot each was peeled from) per round
+        peeled = 0
+        while peeled < n:
+            single = np.flatnonzero(degree == 1)
+            if not len(single):
+                return None
+            # a key alone in two slots is peeled once
+            round_keys, first = np.unique(xor_keys[single], return_index=True)
+            rounds.append((round_keys, single[first]))
+            peeled += len(round_keys)
+            used = slots[round_keys].ravel()
+            np.subtract.at(degree, used, 1)
+            np.bitwise_xor.at(xor_keys, used, np.repeat(round_keys, 3))
+
+        # A key's peel slot is not used by any key peeled later, or by another key of its
+        # round, so each round's slots can be set together once all later rounds are done.
+        table = np.zeros(size, dtype=FINGERPRINT_DTYPES[fingerprint_bits])
+        for round_keys, peel_slots in reversed(rounds):
+            s = slots[round_keys]
+            # the peel slot is still 0, so XOR-ing all three slots reads the other two
+            table[peel_slots] = fps[round_keys] ^ table[s[:, 0]] ^ table[s[:, 1]] ^ table[s[:, 2]]
+        return table
+
+    def __len__(self):
+        return self.count
+
+    def contains(self, item):
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        length, table = self.block_length, self._table
+        fp = (h2 >> 32) & self._fp_mask
+        return fp == (table[(h1 & 0xffffffff) % length]
+                      ^ table[length + (h1 >> 32) % length]
+                      ^ table[2 * length + (h2 & 0xffffffff) % length])
+
+    def __contains__(self, item):
+        return self.contains(item)
+
+    def contains_many(self, items):
+        # Batch lookup, returns a numpy array of bools
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        if not items:
+            return np.zeros(0, dtype=bool)
+        slots, fps = self._slots(_key_hashes(items, self.seed), self.block_length, self.fingerprint_bits)
+        table = self.fingerprints
+        return (table[slots[:, 0]] ^ table[slots[:, 1]] ^ table[slots[:, 2]]) == fps
+
+    def bits_per_key(self):
+        return self.fingerprints.nbytes * 8 / self.count if self.count else 0.0
+
+    def memory_usage(self):
+        total = self.fingerprints.nbytes
+        return {"bytes": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
+
+    def save(self, path):
+        """
+        Write the filter to 'path': versioned header with a crc32, then the fingerprint table
+        """
+        data = self.fingerprints.astype(self.fingerprints.dtype.newbyteorder('<')).tobytes()
+        fields = [XOR_MAGIC, XOR_VERSION, self.fingerprint_bits, self.seed, self.block_length, self.count]
+        crc = zlib.crc32(data, zlib.crc32(XOR_HEADER.pack(*fields, 0)))
+        with open(path, 'wb') as f:
+            f.write(XOR_HEADER.pack(*fields, crc))
+            f.write(data)
+
+    @classmethod
+    def load(cls, path, verify=True):
+        # Memory-map a filter written by save(); the table is used in place, read-only
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, fingerprint_bits, seed, block_length, count, crc = XOR_HEADER.unpack_from(mm)
+        dtype = np.dtype(FINGERPRINT_DTYPES.get(fingerprint_bits, np.uint8)).newbyteorder('<')
+        if (magic != XOR_MAGIC or version != XOR_VERSION or fingerprint_bits not in FINGERPRINT_DTYPES
+                or len(mm) != XOR_HEADER.size + 3 * block_length * dtype.itemsize):
+            mm.close()
+            raise ValueError(f"{path} is not a version {XOR_VERSION} XOR filter file")
+        header = XOR_HEADER.pack(magic, version, fingerprint_bits, seed, block_length, count, 0)
+        if verify and zlib.crc32(memoryview(mm)[XOR_HEADER.size:], zlib.crc32(header)) != crc:
+            mm.close()
+            raise ValueError(f"{path} is corrupted (checksum mismatch)")
+        fingerprints = np.frombuffer(mm, dtype=dtype, count=3 * block_length, offset=XOR_HEADER.size)
+        xf = cls(fingerprints, block_length, count, fingerprint_bits, seed)
+        xf._mmap = mm
+        return xf
+
+    def close(self):
+        # Release the memory map of a filter returned by load()
+        if self._mmap is not None:
+            self._table.release()
+            self._table = self.fingerprints = None
+            self._mmap.close()
+            self._mmap = None
+
+# Testing the lookup times of different number of usernames
+def benchmark_xor_filter(n, number=1000):
+    chars = ascii_lowercase + digits
+    usernames = [''.join(choice(chars) for _ in range(5)) + str(i) for i in range(n)]
+    xf = XorFilter.build(usernames)
+
+    lookups = min(number // 2, len(usernames))
+    negative_samples = number - lookups
+    lookup_names = sample(usernames, lookups) + [''.join(choice(chars) for _ in range(5)) for _ in range(negative_samples)]
+
+    start = time.perf_counter_ns()
+    for name in lookup_names:
+        xf.contains(name)
+    end = time.perf_counter_ns()
+    return ((end - start) / len(lookup_names)) / 1e9
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    n_list_xor = [10**3, 10**4, 10**5, 10**6, 10**7]
+    times_xor = []
+
+    for n in n_list_xor:
+        avg_time = benchmark_xor_filter(n)
+        times_xor.append(avg_time)
+        print(f"n={n}, avg lookup time={avg_time:.9f} s")
+
+    plt.plot(n_list_xor, times_xor, marker="o", color="purple", label="XOR Filter Lookup")
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel("Number of usernames (n)")
+    plt.ylabel("Average lookup time (s)")
+    plt.title("XOR Filter Average Lookup Performance")
+    plt.legend()
+    plt.show()
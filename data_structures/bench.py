@@ -0,0 +1,330 @@
+"""
+Unified benchmark runner for the five lookup structures and the static XOR filter.
+
+    python -m data_structures.bench --structures hash bloom cuckoo --sizes 1000 10000 100000 \
+        --repeats 5 --json results.json --csv results.csv --plot
+    python -m data_structures.bench --sizes 1000 10000 --compare baseline.json
+
+Every (structure, n) pair is built once (build time is recorded), warmed up, and then timed
+over 'repeats' trials of the same lookup set. Positive (present) and negative (absent) lookups
+are reported separately as mean/p50/p95/p99 latency, plus overall throughput. Each record also
+has build throughput and the structure's memory_usage() (bytes per key). --trace-memory rebuilds
+under tracemalloc to capture the peak Python allocation of the build, and once more in a fresh
+process for its peak RSS (a sweep's own peak RSS only ever grows, so it cannot be per build).
+--cache-size repeats the timed trials through a CachedMembership (data_structures/cache.py) and
+adds the cached latencies and the cache's hit rate and evictions to the record.
+--stats replays the lookups once more (untimed) with the structure's opt-in statistics enabled
+(data_structures/stats.py) and adds probe/comparison histograms, layout occupancy and the
+measured false-positive rate on the absent lookups.
+Datasets come from data_structures.dataset: seeded, and cached on disk between runs.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+from data_structures import dataset
+from data_structures.cache import CachedMembership
+from data_structures.stats import OpStats, measure_fpr
+from data_structures.Linear_search import linear_search
+from data_structures.Binary_search import binary_search, sorted_list_memory_usage
+from data_structures.Hash import HashTable
+from data_structures.Bloom import BloomFilter
+from data_structures.Cuckoo import CuckooFilter
+from data_structures.Xor import XorFilter
+
+def _build_hash(usernames):
+    ht = HashTable(size=2 * len(usernames))
+    for name in usernames:
+        ht.insert(name)
+    return ht
+
+def _build_bloom(usernames):
+    bf = BloomFilter.from_fpr(max(len(usernames), 1), target_fpr=0.01)
+    bf.add_many(usernames)
+    return bf
+
+def _build_cuckoo(usernames):
+    cf = CuckooFilter(bucket_count=max(1, len(usernames) // 2), bucket_size=4, auto_resize=True)
+    cf.insert_many(usernames)
+    return cf
+
+# name -> (build(usernames) -> structure, lookup(structure, username) -> bool, memory_usage(structure) -> dict)
+STRUCTURES = {
+    "linear": (list, linear_search, sorted_list_memory_usage),
+    "binary": (sorted, binary_search, sorted_list_memory_usage),
+    "hash": (_build_hash, HashTable.contains, HashTable.memory_usage),
+    "bloom": (_build_bloom, BloomFilter.check, BloomFilter.memory_usage),
+    "cuckoo": (_build_cuckoo, CuckooFilter.lookup, CuckooFilter.memory_usage),
+    "xor": (XorFilter.build, XorFilter.contains, XorFilter.memory_usage),
+}
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def summarize(latencies_ns):
+    values = sorted(latencies_ns)
+    return {
+        "mean_ns": sum(values) / len(values) if values else 0.0,
+        "p50_ns": percentile(values, 50),
+        "p95_ns": percentile(values, 95),
+        "p99_ns": percentile(values, 99),
+    }
+
+def peak_rss_bytes():
+    # Peak resident set size of this process so far (None where the resource module is missing)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # kilobytes on Linux
+
+def traced_build(build, usernames):
+    # Peak bytes allocated by Python while building (tracemalloc slows the build down, so it is a separate run)
+    tracemalloc.start()
+    try:
+        build(usernames)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _rss_build(structure_name, n, number, seed, distribution, cache_dir):
+    # Runs in a fresh process: -> (peak RSS with the dataset loaded, peak RSS after the build)
+    names, _, _ = dataset.load_dataset(n, number, seed, distribution=distribution, cache_dir=cache_dir)
+    usernames = dataset.to_list(names)
+    before = peak_rss_bytes()
+    STRUCTURES[structure_name][0](usernames)
+    return before, peak_rss_bytes()
+
+def rss_build(structure_name, n, number=1000, seed=0, distribution="uniform", cache_dir=None):
+    """
+    Peak RSS of building 'structure_name' in a new process -> {"peak_rss_bytes": the process
+    peak, "build_rss_bytes": how much the build raised it}, or {} without the resource module
+    """
+    if resource is None:
+        return {}
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        before, after = pool.apply(_rss_build, (structure_name, n, number, seed, distribution, cache_dir))
+    return {"peak_rss_bytes": after, "build_rss_bytes": after - before}
+
+def _time_lookups(lookup, structure, names, latencies):
+    clock = time.perf_counter_ns
+    for name in names:
+        start = clock()
+        lookup(structure, name)
+        latencies.append(clock() - start)
+
+def _time_trials(lookup, structure, positives, negatives, repeats, warmup):
+    # -> (positive latencies, negative latencies, median throughput)
+    for _ in range(warmup):
+        for name in positives + negatives:
+            lookup(structure, name)
+
+    pos_latencies, neg_latencies, throughputs = [], [], []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        _time_lookups(lookup, structure, positives, pos_latencies)
+        _time_lookups(lookup, structure, negatives, neg_latencies)
+        elapsed = time.perf_counter_ns() - start
+        throughputs.append((len(positives) + len(negatives)) / (elapsed / 1e9))
+    return pos_latencies, neg_latencies, sorted(throughputs)[len(throughputs) // 2]
+
+def collect_stats(structure, lookup, positives, negatives):
+    # One untimed pass over the lookups with stats enabled, so the timed trials stay uninstrumented
+    if hasattr(structure, "enable_stats"):
+        structure.enable_stats()
+        instrumented = getattr(structure, lookup.__name__) # bound, so the counting version is used
+        for name in positives + negatives:
+            instrumented(name)
+        report = structure.collect_stats()
+        structure.disable_stats()
+    elif isinstance(structure, list): # searched by linear_search / binary_search
+        stats = OpStats()
+        for name in positives + negatives:
+            lookup(structure, name, stats=stats)
+        report = stats.summary()
+    else: # a lookup is always three reads (XOR filter), only the FPR is measured
+        report = {}
+    report["measured_fpr"] = measure_fpr(structure, negatives, lookup=lambda name: lookup(structure, name))
+    return report
+
+def benchmark(structure_name, n, number=1000, repeats=5, warmup=1, seed=0, distribution="uniform",
+              cache_dir=None, trace_memory=False, cache_size=None, cache_policy="lru", stats=False):
+    """
+    Build 'structure_name' with n usernames and time 'number' lookups (half present, drawn
+    with 'distribution') 'repeats' times after 'warmup' untimed passes. With 'cache_size',
+    the trials are repeated through a 'cache_policy' cache of that many usernames. With
+    'stats', the structure's operation statistics are added under "stats".
+    Returns one result record (dict).
+    """
+    build, lookup, memory_usage = STRUCTURES[structure_name]
+    names, lookups, is_positive = dataset.load_dataset(n, number, seed, distribution=distribution,
+                                                       cache_dir=cache_dir)
+    usernames = dataset.to_list(names)
+    positives, negatives = dataset.to_list(lookups[is_positive]), dataset.to_list(lookups[~is_positive])
+
+    start = time.perf_counter_ns()
+    structure = build(usernames)
+    build_ns = time.perf_counter_ns() - start
+    memory = memory_usage(structure)
+
+    pos_latencies, neg_latencies, throughput = _time_trials(lookup, structure, positives, negatives, repeats, warmup)
+
+    result = {
+        "structure": structure_name,
+        "n": n,
+        "lookups": len(positives) + len(negatives),
+        "repeats": repeats,
+        "distribution": distribution,
+        "build_s": build_ns / 1e9,
+        "build_keys_per_s": n / (build_ns / 1e9) if build_ns else 0.0,
+        "memory_bytes": memory["bytes"],
+        "bytes_per_key": memory["bytes_per_item"],
+        "throughput_ops_s": throughput,
+        "positive": summarize(pos_latencies),
+        "negative": summarize(neg_latencies),
+    }
+    if cache_size:
+        cached = CachedMembership(structure, cache_size, cache_policy, lookup=lambda name: lookup(structure, name))
+        pos_latencies, neg_latencies, throughput = _time_trials(CachedMembership.contains, cached, positives,
+                                                                negatives, repeats, warmup)
+        result["cached_throughput_ops_s"] = throughput
+        result["cached_positive"] = summarize(pos_latencies)
+        result["cached_negative"] = summarize(neg_latencies)
+        result["cache"] = cached.stats()
+    if stats:
+        result["stats"] = collect_stats(structure, lookup, positives, negatives)
+    if trace_memory:
+        result["tracemalloc_peak_bytes"] = traced_build(build, usernames)
+        result.update(rss_build(structure_name, n, number, seed, distribution, cache_dir))
+    return result
+
+def run(structures, sizes, **kwargs):
+    results = []
+    for name in structures:
+        for n in sizes:
+            result = benchmark(name, n, **kwargs)
+            results.append(result)
+            print(f"{name:>7} n={n:<10} build={result['build_s']:.3f}s bytes/key={result['bytes_per_key']:.1f} "
+                  f"p50 pos={result['positive']['p50_ns']:.0f}ns neg={result['negative']['p50_ns']:.0f}ns "
+                  f"throughput={result['throughput_ops_s']:.0f}/s")
+            if "cache" in result:
+                print(f"{'':>7} cached: p50 pos={result['cached_positive']['p50_ns']:.0f}ns "
+                      f"neg={result['cached_negative']['p50_ns']:.0f}ns throughput={result['cached_throughput_ops_s']:.0f}/s "
+                      f"hit rate={result['cache']['hit_rate']:.1%} evictions={result['cache']['evictions']}")
+    return results
+
+def flatten(result, prefix=""):
+    # Nested result record -> flat {column: value} for CSV
+    row = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            row.update(flatten(value, prefix + key + "_"))
+        else:
+            row[prefix + key] = value
+    return row
+
+def write_json(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+def write_csv(results, path):
+    rows = [flatten(r) for r in results]
+    columns = []
+    for row in rows:
+        columns += [c for c in row if c not in columns]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def compare(results, baseline, threshold=0.10):
+    """
+    Compare results against a baseline run (list of records). Returns a list of regression
+    messages: p50 latencies more than 'threshold' slower or throughput more than 'threshold' lower.
+    """
+    old = {(r["structure"], r["n"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = old.get((r["structure"], r["n"]))
+        if base is None:
+            continue
+        label = f"{r['structure']} n={r['n']}"
+        for kind in ("positive", "negative"):
+            new_ns, old_ns = r[kind]["p50_ns"], base[kind]["p50_ns"]
+            if old_ns and new_ns > old_ns * (1 + threshold):
+                regressions.append(f"{label}: {kind} p50 {old_ns:.0f}ns -> {new_ns:.0f}ns")
+        if r["throughput_ops_s"] < base["throughput_ops_s"] * (1 - threshold):
+            regressions.append(f"{label}: throughput {base['throughput_ops_s']:.0f}/s -> {r['throughput_ops_s']:.0f}/s")
+    return regressions
+
+def plot(results):
+    import matplotlib.pyplot as plt
+
+    fig, (time_ax, space_ax) = plt.subplots(1, 2, figsize=(12, 5))
+    for name in dict.fromkeys(r["structure"] for r in results):
+        rows = [r for r in results if r["structure"] == name]
+        time_ax.plot([r["n"] for r in rows], [r["positive"]["p50_ns"] / 1e9 for r in rows], marker="o", label=name)
+        # space/time trade-off: one point per size
+        space_ax.scatter([r["bytes_per_key"] for r in rows], [r["positive"]["p50_ns"] / 1e9 for r in rows], label=name)
+    time_ax.set(xscale="log", yscale="log", xlabel="Number of usernames (n)", ylabel="Median lookup time (s)",
+                title="Comparison of Lookup Time Complexities")
+    space_ax.set(xscale="log", yscale="log", xlabel="Memory (bytes per username)", ylabel="Median lookup time (s)",
+                 title="Space/Time Trade-off")
+    time_ax.legend()
+    space_ax.legend()
+    plt.show()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--structures", nargs="+", choices=list(STRUCTURES), default=list(STRUCTURES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10**3, 10**4, 10**5])
+    parser.add_argument("--lookups", type=int, default=1000, help="lookups per trial (half present)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--distribution", choices=["uniform", "zipf"], default="uniform",
+                        help="how present usernames are drawn for lookups")
+    parser.add_argument("--cache-dir", default=dataset.DEFAULT_CACHE_DIR,
+                        help="where generated datasets are cached ('' to disable)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    parser.add_argument("--trace-memory", action="store_true", help="also record the tracemalloc and RSS peaks of each build")
+    parser.add_argument("--cache-size", type=int, help="also time lookups through a cache of this many usernames")
+    parser.add_argument("--cache-policy", choices=["lru", "tinylfu"], default="lru")
+    parser.add_argument("--stats", action="store_true", help="also record probe counts, occupancy and measured FPR")
+    parser.add_argument("--plot", action="store_true", help="plot median lookup time (needs matplotlib)")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    results = run(args.structures, args.sizes, number=args.lookups, repeats=args.repeats,
+                  warmup=args.warmup, seed=args.seed, distribution=args.distribution,
+                  cache_dir=args.cache_dir or None, trace_memory=args.trace_memory,
+                  cache_size=args.cache_size, cache_policy=args.cache_policy, stats=args.stats)
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.plot:
+        plot(results)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for message in regressions:
+            print("REGRESSION", message)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
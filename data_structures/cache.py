@@ -0,0 +1,187 @@
+"""
+Bounded lookup cache in front of any membership structure.
+
+Username lookups are skewed (the same popular names are checked over and over during signup
+storms), so the most recent answers are kept in an LRU map and served without hashing into
+the structure again. With policy="tinylfu", a new username only displaces the least recently
+used one if a count-min sketch of recent lookups says it is requested more often, which keeps
+one-off names from flushing the hot set.
+
+    cached = CachedMembership(HashTable(10**6), maxsize=10000, policy="tinylfu")
+    cached.add("alice")             # invalidates the cached answer for "alice"
+    cached.contains("alice")
+    print(cached.stats())
+"""
+from collections import OrderedDict
+import mmh3
+import numpy as np
+
+from data_structures.Hash import HashTable
+
+class CountMinSketch:
+    """
+    Approximate frequency counts in 4 rows of 'width' 8-bit counters (one row per 32-bit word
+    of a 128-bit mmh3 hash). After 'sample_size' increments every counter is halved, so old
+    popularity fades.
+    """
+    def __init__(self, width=1024, sample_size=None, seed=0):
+        self.width = 1 << max(width - 1, 1).bit_length() # power of two for masking
+        self.mask = self.width - 1
+        self.rows = [bytearray(self.width) for _ in range(4)]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+        self.seed = seed
+
+    def _indexes(self, item):
+        h1, h2 = mmh3.hash64(item, self.seed, signed=False)
+        mask = self.mask
+        return h1 & mask, (h1 >> 32) & mask, h2 & mask, (h2 >> 32) & mask
+
+    def increment(self, item):
+        # Count one occurrence of item and return its new estimate
+        r0, r1, r2, r3 = self.rows
+        a, b, c, d = self._indexes(item)
+        estimate = min(r0[a], r1[b], r2[c], r3[d])
+        if estimate < 255:
+            # conservative update: only raise the counters that hold the minimum
+            estimate += 1
+            for row, i in ((r0, a), (r1, b), (r2, c), (r3, d)):
+                if row[i] < estimate:
+                    row[i] = estimate
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            for row in self.rows:
+                counters = np.frombuffer(row, dtype=np.uint8)
+                counters >>= 1
+                del counters # release the buffer export
+            self.additions //= 2
+        return estimate
+
+    def estimate(self, item):
+        r0, r1, r2, r3 = self.rows
+        a, b, c, d = self._indexes(item)
+        return min(r0[a], r1[b], r2[c], r3[d])
+
+class CachedMembership:
+    def __init__(self, structure, maxsize=1024, policy="lru", lookup=None):
+        """
+        Cache 'maxsize' answers of structure.contains (or of 'lookup(username)', for structures
+        without a contains method such as a plain sorted list).
+        """
+        if policy not in ("lru", "tinylfu"):
+            raise ValueError(f"policy must be 'lru' or 'tinylfu', got {policy!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.structure = structure
+        self.maxsize = maxsize
+        self.policy = policy
+        self._lookup = lookup or structure.contains
+        self._cache = OrderedDict()
+        self.sketch = CountMinSketch(width=4 * maxsize) if policy == "tinylfu" else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0 # TinyLFU refused to admit the username
+
+    def _admit(self, username, found, frequency=0):
+        cache = self._cache
+        if username in cache: # a repeated miss within one contains_many() batch
+            cache[username] = found
+            cache.move_to_end(username)
+            return
+        if len(cache) >= self.maxsize:
+            if self.sketch is not None:
+                victim = next(iter(cache))
+                if frequency <= self.sketch.estimate(victim):
+                    self.rejections += 1
+                    return
+            cache.popitem(last=False)
+            self.evictions += 1
+        cache[username] = found
+
+    def contains(self, username):
+        frequency = self.sketch.increment(username) if self.sketch is not None else 0
+        cache = self._cache
+        found = cache.get(username)
+        if found is not None:
+            cache.move_to_end(username)
+            self.hits += 1
+            return found
+        self.misses += 1
+        found = bool(self._lookup(username))
+        self._admit(username, found, frequency)
+        return found
+
+    def __contains__(self, username):
+        return self.contains(username)
+
+    def contains_many(self, usernames):
+        # Serve hits from the cache and send all misses to the structure as one batch
+        usernames = usernames if isinstance(usernames, (list, tuple)) else list(usernames)
+        found = np.zeros(len(usernames), dtype=bool)
+        cache = self._cache
+        missing, frequencies = [], []
+        for i, username in enumerate(usernames):
+            frequency = self.sketch.increment(username) if self.sketch is not None else 0
+            hit = cache.get(username)
+            if hit is None:
+                missing.append(i)
+                frequencies.append(frequency)
+            else:
+                cache.move_to_end(username)
+                found[i] = hit
+        self.hits += len(usernames) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            keys = [usernames[i] for i in missing]
+            if hasattr(self.structure, "contains_many"):
+                answers = self.structure.contains_many(keys)
+            else:
+                answers = [self._lookup(k) for k in keys]
+            for i, key, answer, frequency in zip(missing, keys, answers, frequencies):
+                found[i] = answer
+                self._admit(key, bool(answer), frequency)
+        return found
+
+    # Mutations go to the structure and drop the stale cached answer
+    def add(self, username):
+        self._cache.pop(username, None)
+        return self.structure.add(username)
+
+    def insert(self, username):
+        self._cache.pop(username, None)
+        return self.structure.insert(username)
+
+    def put(self, username, value):
+        self._cache.pop(username, None)
+        return self.structure.put(username, value)
+
+    def delete(self, username):
+        if isinstance(self.structure, HashTable):
+            self._cache.pop(username, None)
+        else:
+            # a filter delete can also turn another username's false positive into a negative
+            self._cache.clear()
+        return self.structure.delete(username)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self.structure)
+
+    def memory_usage(self):
+        return self.structure.memory_usage()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "rejections": self.rejections,
+        }
@@ -0,0 +1,106 @@
+"""
+Seeded, vectorized username datasets shared by the benchmarks.
+
+Usernames follow the same shape as the per-structure benchmarks (random lowercase/digit prefix
+followed by the username's index, so every name is unique) but are generated with NumPy from a
+seed. Datasets are returned as fixed-width bytes arrays ('S' dtype); use to_list() to get str.
+
+    usernames = generate_usernames(10**7, seed=1)
+    lookups, is_positive = lookup_set(usernames, 1000, distribution="zipf", seed=2)
+    usernames, lookups, is_positive = load_dataset(10**7, cache_dir=".cache/datasets")
+"""
+import os
+from string import ascii_lowercase, digits
+import numpy as np
+
+chars = ascii_lowercase + digits # random usernames
+DEFAULT_CACHE_DIR = os.path.join(".cache", "datasets")
+DATASET_VERSION = 2 # part of the cache file names: bump when generation changes
+
+def _random_strings(rng, n, length, alphabet):
+    # n random strings; 'length' is a fixed length or a (min, max) range, inclusive
+    low, high = (length, length) if isinstance(length, int) else length
+    letters = np.frombuffer(alphabet.encode(), dtype=np.uint8)
+    codes = letters[rng.integers(0, len(letters), size=(n, high))]
+    if low != high:
+        lengths = rng.integers(low, high + 1, size=n)
+        codes[np.arange(high) >= lengths[:, None]] = 0 # trailing NULs are dropped by the 'S' dtype
+    return codes.view(f'S{max(high, 1)}').ravel()
+
+def generate_usernames(n, seed=0, length=5, alphabet=chars):
+    """
+    n unique usernames: a random prefix of 'length' characters (int or (min, max)) followed by
+    the username's index, as an 'S' array. With a length range the index is zero-padded to a
+    fixed width, otherwise "ab" + "11" and "ab1" + "1" would be the same username.
+    """
+    rng = np.random.default_rng(seed)
+    width = len(str(max(n - 1, 0)))
+    if isinstance(length, int):
+        suffixes = np.arange(n).astype(f'S{width}')
+    else:
+        powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+        suffixes = (np.arange(n, dtype=np.int64)[:, None] // powers % 10 + ord('0')).astype(np.uint8)
+        suffixes = suffixes.view(f'S{width}').ravel()
+    return np.char.add(_random_strings(rng, n, length, alphabet), suffixes)
+
+def lookup_set(usernames, number=1000, positive_fraction=0.5, distribution="uniform", zipf_a=1.2,
+               seed=0, negative_length=5, alphabet=chars):
+    """
+    'number' lookups mixing present and absent usernames, shuffled.
+    Present names are drawn uniformly or with a Zipf(zipf_a) skew over the usernames (a few very
+    popular names, as in signup storms); absent names are random 'negative_length' strings that
+    are not in 'usernames'. Returns (lookups, is_positive).
+    """
+    if distribution not in ("uniform", "zipf"):
+        raise ValueError(f"distribution must be 'uniform' or 'zipf', got {distribution!r}")
+    rng = np.random.default_rng(seed)
+    n = len(usernames)
+    positives = min(round(number * positive_fraction), number) if n else 0
+    if distribution == "uniform":
+        ranks = rng.integers(0, max(n, 1), size=positives)
+    else:
+        ranks = (rng.zipf(zipf_a, size=positives) - 1) % max(n, 1)
+    present = np.asarray(usernames)[ranks]
+
+    absent = np.zeros(0, dtype='S1')
+    while len(absent) < number - positives:
+        candidates = _random_strings(rng, 2 * (number - positives - len(absent)), negative_length, alphabet)
+        candidates = candidates[~np.isin(candidates, usernames)]
+        absent = np.concatenate([absent, candidates])[:number - positives]
+
+    lookups = np.concatenate([present, absent])
+    is_positive = np.arange(len(lookups)) < positives
+    order = rng.permutation(len(lookups))
+    return lookups[order], is_positive[order]
+
+def _cache_path(cache_dir, kind, **params):
+    name = "_".join(f"{k}{v}" for k, v in dict(params, v=DATASET_VERSION).items()).replace(" ", "")
+    return os.path.join(cache_dir, f"{kind}_{name}.npy")
+
+def load_dataset(n, number=1000, seed=0, length=5, distribution="uniform", positive_fraction=0.5,
+                 cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Usernames plus a lookup set, cached under 'cache_dir' as .npy files so repeated runs load
+    them instead of regenerating (usernames are memory-mapped). cache_dir=None disables caching.
+    Returns (usernames, lookups, is_positive).
+    """
+    if cache_dir is None:
+        usernames = generate_usernames(n, seed, length)
+        return (usernames,) + lookup_set(usernames, number, positive_fraction, distribution, seed=seed + 1)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    names_path = _cache_path(cache_dir, "usernames", n=n, seed=seed, len=length)
+    lookups_path = _cache_path(cache_dir, "lookups", n=n, seed=seed, len=length, num=number,
+                               dist=distribution, pos=positive_fraction)
+    if not os.path.exists(names_path):
+        np.save(names_path, generate_usernames(n, seed, length))
+    usernames = np.load(names_path, mmap_mode='r')
+    if not os.path.exists(lookups_path):
+        lookups, is_positive = lookup_set(usernames, number, positive_fraction, distribution, seed=seed + 1)
+        np.save(lookups_path, np.rec.fromarrays([lookups, is_positive], names="name,positive"))
+    records = np.load(lookups_path)
+    return usernames, records["name"], records["positive"]
+
+def to_list(names):
+    # 'S' array -> list of str
+    return [name.decode() for name in names.tolist()]
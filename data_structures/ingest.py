@@ -0,0 +1,128 @@
+"""
+Streaming, bounded-memory ingestion of usernames.
+
+Usernames are consumed from any iterator or file in fixed-size chunks, so building a structure
+needs the structure plus one chunk of memory instead of the whole username list. Files are
+either newline-separated text or a .npy 'S' array (as written by data_structures.dataset),
+which is memory-mapped. For the sorted structures, external_sort() sorts runs of one chunk
+each to temporary files and streams back their k-way merge, at most MERGE_FAN_IN runs at a
+time so the number of open files stays bounded.
+
+    ht = HashTable.from_file("usernames.txt")
+    index = SortedIndex.from_iterable(read_usernames("usernames.npy"))
+"""
+import heapq
+import os
+import tempfile
+from itertools import islice
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+MERGE_FAN_IN = 256 # run files open at once during a merge (typical limit: 1024 descriptors)
+
+def chunked(iterable, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Lists of up to chunk_size items (None for the default)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def read_usernames(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream usernames (str) from a newline-separated text file (blank lines skipped) or a
+    .npy 'S' array
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    if path.endswith(".npy"):
+        names = np.load(path, mmap_mode='r')
+        for lo in range(0, len(names), chunk_size):
+            for name in names[lo:lo + chunk_size].tolist():
+                yield name.decode()
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            name = line.rstrip(b'\r\n')
+            if name:
+                yield name.decode()
+
+def ingest(structure, usernames, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Add usernames to 'structure' one chunk at a time, through add_many() where the structure
+    has a batch path. Returns the number of usernames consumed.
+    """
+    add_many = getattr(structure, "add_many", None)
+    count = 0
+    for chunk in chunked(usernames, chunk_size):
+        if add_many is not None:
+            add_many(chunk)
+        else:
+            for username in chunk:
+                structure.add(username)
+        count += len(chunk)
+    return count
+
+def sorted_runs(usernames, tmp_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Sort 'usernames' one chunk at a time into run files under tmp_dir (one UTF-8 name per line).
+    Returns (run paths, number of usernames, widest encoded username).
+    """
+    paths = []
+    count = width = 0
+    for chunk in chunked(usernames, chunk_size):
+        keys = sorted(u.encode() for u in chunk)
+        path = os.path.join(tmp_dir, f"run{len(paths)}")
+        with open(path, 'wb') as f:
+            f.write(b"\n".join(keys) + b"\n")
+        paths.append(path)
+        count += len(keys)
+        width = max(width, max(map(len, keys)))
+    return paths, count, width
+
+def merge_runs(paths, unique=True, fan_in=MERGE_FAN_IN):
+    """
+    k-way merge of sorted run files -> sorted usernames as bytes (duplicates dropped when unique).
+    More than fan_in runs are first merged fan_in at a time into intermediate runs next to them.
+    """
+    level = 0
+    while len(paths) > fan_in:
+        tmp_dir = os.path.dirname(paths[0])
+        merged = []
+        for lo in range(0, len(paths), fan_in):
+            path = os.path.join(tmp_dir, f"merge{level}_{len(merged)}")
+            with open(path, 'wb') as f:
+                f.writelines(key + b"\n" for key in _merge(paths[lo:lo + fan_in], unique))
+            merged.append(path)
+        if level: # intermediate runs of the previous pass are no longer needed
+            for path in paths:
+                os.remove(path)
+        paths = merged
+        level += 1
+    yield from _merge(paths, unique)
+
+def _merge(paths, unique):
+    files = [open(path, 'rb') for path in paths]
+    try:
+        prev = None
+        for line in heapq.merge(*files):
+            key = line[:-1]
+            if unique and key == prev:
+                continue
+            prev = key
+            yield key
+    finally:
+        for f in files:
+            f.close()
+
+def external_sort(usernames, chunk_size=DEFAULT_CHUNK_SIZE, tmp_dir=None, unique=True):
+    """
+    Sorted (bytewise, as the sorted structures compare) usernames from any iterator, holding
+    one chunk in memory at a time. Run files live in a temporary directory under tmp_dir that
+    is removed once the merge is exhausted or closed.
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        paths, _, _ = sorted_runs(usernames, tmp, chunk_size)
+        for key in merge_runs(paths, unique):
+            yield key.decode()
@@ -0,0 +1,86 @@
+"""
+Common membership protocol and a tiered (filter + exact store) composite.
+
+All five approaches answer "is this username taken?" through the same methods:
+
+    contains(username) -> bool
+    contains_many(usernames) -> numpy array of bool
+
+ScanEngine (linear), SortedIndex and FrontCodedDict (binary search), HashTable, BloomFilter and
+CuckooFilter all implement Membership; HashTable, BloomFilter and CuckooFilter also accept
+add(username) (MutableMembership).
+"""
+from typing import Protocol, runtime_checkable
+import numpy as np
+
+@runtime_checkable
+class Membership(Protocol):
+    def contains(self, item): ...
+    def contains_many(self, items): ...
+
+@runtime_checkable
+class MutableMembership(Membership, Protocol):
+    def add(self, item): ...
+
+class TieredMembership:
+    """
+    Probabilistic pre-filter in front of an exact backend.
+    A negative from the in-memory filter (BloomFilter/CuckooFilter) is final; only filter
+    positives are sent to the slower exact backend (a large HashTable, a memory-mapped
+    FrontCodedDict, ...). Per-tier counters show how much backend load the filter saves.
+    """
+    def __init__(self, prefilter, backend):
+        self.prefilter = prefilter
+        self.backend = backend
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.queries = 0          # lookups answered
+        self.filter_negatives = 0 # answered by the filter alone
+        self.backend_queries = 0  # filter positives forwarded to the backend
+        self.backend_hits = 0     # ... that the backend confirmed
+
+    def contains(self, item):
+        self.queries += 1
+        if not self.prefilter.contains(item):
+            self.filter_negatives += 1
+            return False
+        self.backend_queries += 1
+        found = bool(self.backend.contains(item))
+        self.backend_hits += found
+        return found
+
+    def __contains__(self, item):
+        return self.contains(item)
+
+    def contains_many(self, items):
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        maybe = np.flatnonzero(self.prefilter.contains_many(items))
+        found = np.zeros(len(items), dtype=bool)
+        if len(maybe):
+            found[maybe] = self.backend.contains_many([items[i] for i in maybe])
+        self.queries += len(items)
+        self.filter_negatives += len(items) - len(maybe)
+        self.backend_queries += len(maybe)
+        self.backend_hits += int(found.sum())
+        return found
+
+    def add(self, item):
+        # Backend first, so the filter never points at an item the backend does not have yet
+        if not isinstance(self.backend, MutableMembership):
+            raise TypeError(f"{type(self.backend).__name__} backend is read-only")
+        self.backend.add(item)
+        self.prefilter.add(item)
+
+    def stats(self):
+        false_positives = self.backend_queries - self.backend_hits
+        negatives = self.queries - self.backend_hits
+        return {
+            "queries": self.queries,
+            "filter_negatives": self.filter_negatives,
+            "backend_queries": self.backend_queries,
+            "backend_hits": self.backend_hits,
+            "filter_false_positives": false_positives,
+            # share of absent usernames that still reached the backend
+            "observed_fpr": false_positives / negatives if negatives else 0.0,
+        }
@@ -0,0 +1,241 @@
+"""
+asyncio username-availability server with request coalescing and micro-batching.
+
+Line protocol over TCP, one request per line, pipelining allowed (responses come back in order):
+
+    contains <username>  ->  1 | 0
+    add <username>       ->  OK | ERR <reason>
+
+Lookups that arrive within 'window' seconds of each other are answered with a single
+contains_many() call on the structure (any Membership, see data_structures/membership.py);
+identical usernames already waiting for a batch share one result. At most 'max_pending'
+requests are in flight: past that the server stops reading from sockets, so TCP pushes back
+on clients.
+
+    python -m data_structures.server serve --structure bloom --n 1000000 --port 8765
+    python -m data_structures.server load --port 8765 --n 1000000 --connections 32 --requests 100000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from data_structures import dataset
+from data_structures.bench import summarize, _build_hash, _build_bloom, _build_cuckoo
+from data_structures.membership import MutableMembership
+from data_structures.Linear_search import ScanEngine
+from data_structures.Binary_search import SortedIndex
+
+# name -> build(usernames) -> Membership
+BUILDERS = {
+    "linear": ScanEngine,
+    "binary": lambda usernames: SortedIndex(sorted(usernames)),
+    "hash": _build_hash,
+    "bloom": _build_bloom,
+    "cuckoo": _build_cuckoo,
+}
+
+class MembershipServer:
+    def __init__(self, structure, window=0.0005, max_batch=4096, max_pending=10000, max_line=1024):
+        self.structure = structure
+        self.window = window           # seconds to wait for more lookups before running a batch
+        self.max_batch = max_batch     # run the batch early once this many distinct usernames wait
+        self.max_line = max_line
+        self._slots = asyncio.Semaphore(max_pending)
+        self._waiting = {}             # username -> Future shared by every request for it
+        self._timer = None
+        self._server = None
+        self._handlers = set()         # one task per open connection, ended by close()
+        self.requests = 0
+        self.batches = 0
+        self.batched_keys = 0
+        self.coalesced = 0             # lookups answered by another request's in-flight future
+
+    async def contains(self, username):
+        self.requests += 1
+        future = self._waiting.get(username)
+        if future is not None:
+            self.coalesced += 1
+            return await future
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[username] = future
+        if len(self._waiting) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiting, self._waiting = self._waiting, {}
+        if not waiting:
+            return
+        self.batches += 1
+        self.batched_keys += len(waiting)
+        try:
+            found = self.structure.contains_many(list(waiting))
+        except Exception as e:
+            for future in waiting.values():
+                future.set_exception(e)
+            return
+        for future, hit in zip(waiting.values(), found):
+            future.set_result(bool(hit))
+
+    def add(self, username):
+        self.requests += 1
+        if not isinstance(self.structure, MutableMembership):
+            raise TypeError(f"{type(self.structure).__name__} is read-only")
+        # run pending lookups first so they are answered as of before this add
+        self._flush()
+        self.structure.add(username)
+
+    async def _respond(self, line):
+        try:
+            command, _, username = line.decode().strip().partition(" ")
+            if not username:
+                return b"ERR expected '<command> <username>'\n"
+            if command == "contains":
+                return b"1\n" if await self.contains(username) else b"0\n"
+            if command == "add":
+                self.add(username)
+                return b"OK\n"
+            return f"ERR unknown command {command!r}\n".encode()
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            return f"ERR {e}\n".encode()
+        finally:
+            self._slots.release()
+
+    async def _handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        responses = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                task = await responses.get()
+                if task is None:
+                    break
+                writer.write(await task)
+                if responses.empty():
+                    await writer.drain()
+
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while True:
+                await self._slots.acquire() # backpressure: stop reading while too many requests are pending
+                try:
+                    line = await reader.readuntil(b"\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    self._slots.release()
+                    break
+                await responses.put(asyncio.create_task(self._respond(line)))
+        finally:
+            self._handlers.discard(handler)
+            responses.put_nowait(None)
+            try:
+                await writer_task
+            except ConnectionError:
+                pass
+            finally:
+                # also reached when close() cancels this handler
+                writer_task.cancel()
+                writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._server = await asyncio.start_server(self._handle, host, port, limit=self.max_line)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        # Stop accepting connections, then end the open ones (each handler closes its socket)
+        self._server.close()
+        handlers = list(self._handlers)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.batched_keys / self.batches if self.batches else 0.0,
+            "coalesced": self.coalesced,
+        }
+
+async def _client(host, port, lookups, latencies, pipeline):
+    reader, writer = await asyncio.open_connection(host, port)
+    clock = time.perf_counter_ns
+    try:
+        for i in range(0, len(lookups), pipeline):
+            chunk = lookups[i:i + pipeline]
+            start = clock()
+            writer.write(b"".join(b"contains " + name + b"\n" for name in chunk))
+            await writer.drain()
+            for _ in chunk:
+                await reader.readline()
+            # every request in a pipelined chunk waited for the whole chunk
+            latencies.extend([clock() - start] * len(chunk))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def load_test(host, port, lookups, connections=16, pipeline=1):
+    """
+    Send 'lookups' (bytes usernames) as contains requests over 'connections' concurrent
+    connections, 'pipeline' requests at a time per connection.
+    Returns sustained QPS and latency percentiles.
+    """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, lookups[c::connections], latencies, pipeline)
+                           for c in range(connections)))
+    elapsed = time.perf_counter() - start
+    return {"requests": len(latencies), "seconds": elapsed, "qps": len(latencies) / elapsed,
+            **summarize(latencies)}
+
+async def serve(structure_name, n, host, port, seed=0, **kwargs):
+    usernames = dataset.to_list(dataset.generate_usernames(n, seed))
+    server = MembershipServer(BUILDERS[structure_name](usernames), **kwargs)
+    await server.start(host, port)
+    print(f"serving {structure_name} with {n} usernames on {host}:{server.port}")
+    async with server._server:
+        await server._server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--n", type=int, default=10**5, help="number of usernames (same seed on both sides)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--structure", choices=list(BUILDERS), default="hash")
+    parser.add_argument("--window", type=float, default=0.0005, help="batching window in seconds")
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--max-pending", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10**4)
+    parser.add_argument("--pipeline", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        asyncio.run(serve(args.structure, args.n, args.host, args.port, args.seed, window=args.window,
+                          max_batch=args.max_batch, max_pending=args.max_pending))
+        return 0
+    _, lookups, _ = dataset.load_dataset(args.n, args.requests, args.seed, cache_dir=None)
+    result = asyncio.run(load_test(args.host, args.port, lookups.tolist(), args.connections, args.pipeline))
+    print(f"{result['requests']} requests in {result['seconds']:.2f}s → {result['qps']:.0f} QPS, "
+          f"p50={result['p50_ns'] / 1e3:.0f}µs p95={result['p95_ns'] / 1e3:.0f}µs p99={result['p99_ns'] / 1e3:.0f}µs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
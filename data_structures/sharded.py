@@ -0,0 +1,179 @@
+"""
+Hash-sharded, multi-process membership index.
+
+Usernames are partitioned by an mmh3 hash across N worker processes; each worker owns one
+HashTable, BloomFilter or CuckooFilter shard and talks to the parent over a Pipe. Each shard is sized
+for expected_items / shards usernames (or for its first batch) and grows past that, so later
+add()/add_many() calls never overfill it; bloom shards are ScalableBloomFilters. Batched
+calls are scattered (one message per shard, sent to every shard before any reply is read, so
+shards work in parallel) and gathered back into input order.
+
+    with ShardedMembership.build(usernames, kind="cuckoo", shards=8) as index:
+        found = index.contains_many(queries)
+        print(index.stats())
+"""
+import time
+from multiprocessing import Pipe, Process, cpu_count
+import mmh3
+import numpy as np
+
+from data_structures.Bloom import ScalableBloomFilter
+from data_structures.Cuckoo import CuckooFilter
+from data_structures.Hash import HashTable
+
+SHARD_SEED = 0x5eed # independent of the seeds the structures hash with
+MIN_SHARD_CAPACITY = 1024 # tiny Bloom sub-filters miss their false-positive target
+
+# kind -> empty(capacity) -> structure that starts with room for 'capacity' usernames and grows
+SHARD_BUILDERS = {
+    "hash": lambda capacity: HashTable(size=2 * capacity),
+    "bloom": lambda capacity: ScalableBloomFilter(initial_capacity=capacity, target_fpr=0.01),
+    "cuckoo": lambda capacity: CuckooFilter(bucket_count=max(1, capacity // 2), bucket_size=4, auto_resize=True),
+}
+
+def _shard_worker(conn, kind, capacity=None):
+    # Worker loop: apply (command, usernames) messages to this process's shard
+    structure = None
+    keys = queries = 0
+    busy = 0.0
+    while True:
+        command, usernames = conn.recv()
+        if command == "close":
+            conn.close()
+            return
+        start = time.perf_counter()
+        try:
+            if command == "add_many":
+                if structure is None:
+                    structure = SHARD_BUILDERS[kind](max(capacity or len(usernames), MIN_SHARD_CAPACITY))
+                if hasattr(structure, "add_many"):
+                    structure.add_many(usernames)
+                else:
+                    for username in usernames:
+                        structure.add(username)
+                keys += len(usernames)
+                reply = len(usernames)
+            elif command == "contains_many":
+                queries += len(usernames)
+                if structure is None:
+                    reply = np.zeros(len(usernames), dtype=bool)
+                else:
+                    reply = np.asarray(structure.contains_many(usernames), dtype=bool)
+            elif command == "stats":
+                memory = structure.memory_usage()["bytes"] if structure is not None else 0
+                reply = {"keys": keys, "queries": queries, "memory_bytes": memory, "busy_s": busy}
+            else:
+                raise ValueError(f"unknown command {command!r}")
+        except Exception as e: # hand the error to the parent instead of killing the shard
+            reply = e
+        busy += time.perf_counter() - start
+        conn.send(reply)
+
+class ShardedMembership:
+    def __init__(self, kind="hash", shards=None, seed=SHARD_SEED, expected_items=None):
+        # expected_items: total usernames expected, used to presize every shard (optional)
+        if kind not in SHARD_BUILDERS:
+            raise ValueError(f"kind must be one of {sorted(SHARD_BUILDERS)}, got {kind!r}")
+        self.kind = kind
+        self.seed = seed
+        self.shards = shards or cpu_count()
+        capacity = -(-expected_items // self.shards) if expected_items else None
+        self._conns = []
+        self._procs = []
+        for _ in range(self.shards):
+            parent, child = Pipe()
+            proc = Process(target=_shard_worker, args=(child, kind, capacity), daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    @classmethod
+    def build(cls, usernames, kind="hash", shards=None, seed=SHARD_SEED, expected_items=None):
+        # Partition once and build every shard in parallel
+        usernames = usernames if isinstance(usernames, (list, tuple)) else list(usernames)
+        index = cls(kind, shards, seed, expected_items or len(usernames))
+        index.add_many(usernames)
+        return index
+
+    def _shard_of(self, username):
+        return mmh3.hash(username, self.seed, signed=False) % self.shards
+
+    def _partition(self, usernames):
+        # -> per shard (positions in the input, usernames)
+        usernames = usernames if isinstance(usernames, (list, tuple)) else list(usernames)
+        shard_ids = np.fromiter((mmh3.hash(u, self.seed, signed=False) for u in usernames),
+                                dtype=np.uint32, count=len(usernames)) % self.shards
+        order = np.argsort(shard_ids, kind="stable")
+        bounds = np.searchsorted(shard_ids[order], np.arange(self.shards + 1))
+        return [(order[lo:hi], [usernames[i] for i in order[lo:hi]]) for lo, hi in zip(bounds, bounds[1:])]
+
+    def _scatter_gather(self, command, parts):
+        # Send every shard its part before waiting on any reply
+        busy = [i for i, part in enumerate(parts) if part]
+        for i in busy:
+            self._conns[i].send((command, parts[i]))
+        replies = {}
+        for i in busy:
+            replies[i] = self._conns[i].recv()
+        for reply in replies.values():
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def add(self, username):
+        parts = [[] for _ in range(self.shards)]
+        parts[self._shard_of(username)].append(username)
+        self._scatter_gather("add_many", parts)
+
+    def add_many(self, usernames):
+        parts = self._partition(usernames)
+        return sum(self._scatter_gather("add_many", [keys for _, keys in parts]).values())
+
+    def contains(self, username):
+        shard = self._shard_of(username)
+        self._conns[shard].send(("contains_many", [username]))
+        reply = self._conns[shard].recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return bool(reply[0])
+
+    def __contains__(self, username):
+        return self.contains(username)
+
+    def contains_many(self, usernames):
+        parts = self._partition(usernames)
+        found = np.zeros(sum(len(positions) for positions, _ in parts), dtype=bool)
+        replies = self._scatter_gather("contains_many", [keys for _, keys in parts])
+        for i, reply in replies.items():
+            found[parts[i][0]] = reply
+        return found
+
+    def stats(self):
+        # Per-shard counters: keys, queries answered, memory and time spent working
+        replies = self._scatter_gather("stats", [True] * self.shards)
+        return [{"shard": i, **replies[i]} for i in range(self.shards)]
+
+    def __len__(self):
+        return sum(s["keys"] for s in self.stats())
+
+    def memory_usage(self):
+        total = sum(s["memory_bytes"] for s in self.stats())
+        n = len(self)
+        return {"bytes": total, "items": n, "bytes_per_item": total / n if n else 0.0}
+
+    def close(self):
+        for conn, proc in zip(self._conns, self._procs):
+            try:
+                conn.send(("close", None))
+                conn.close()
+            except OSError:
+                pass
+            proc.join()
+        self._conns, self._procs = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,92 @@
+"""
+Opt-in operation statistics for the lookup structures.
+
+Stats are off by default and cost nothing then: structure.enable_stats() shadows the hot
+methods of that one instance with counting versions (instance attributes take precedence over
+class methods) and disable_stats() removes them again. The counting versions record counters
+(lookups, hits, failed inserts, ...) and histograms (probes per lookup, bits probed, ...) into
+an OpStats; structure.collect_stats() adds a snapshot of the layout (chain lengths, bucket
+occupancy, fill ratio) that is computed on demand.
+
+    ht.enable_stats(timer=lambda op, ns: latencies[op].append(ns))
+    ...
+    print(ht.collect_stats())
+    print(measure_fpr(bloom, known_absent_usernames))
+"""
+import time
+from collections import Counter, defaultdict
+
+class OpStats:
+    def __init__(self, timer=None):
+        self.counters = Counter()
+        self.histograms = defaultdict(Counter) # name -> {value: occurrences}
+        # called as timer(operation name, elapsed ns) around every instrumented operation
+        self.timer = timer
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def observe(self, name, value):
+        self.histograms[name][value] += 1
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def summary(self):
+        report = dict(self.counters)
+        for name, histogram in self.histograms.items():
+            report[name] = summarize_histogram(histogram)
+        return report
+
+def summarize_histogram(histogram):
+    # {value: occurrences} -> count, mean, p50, p99 and max of the values
+    total = sum(histogram.values())
+    if not total:
+        return {"count": 0, "mean": 0.0, "p50": 0, "p99": 0, "max": 0}
+    values = sorted(histogram)
+    cumulative, p50, p99 = 0, None, None
+    for value in values:
+        cumulative += histogram[value]
+        if p50 is None and cumulative >= 0.5 * total:
+            p50 = value
+        if p99 is None and cumulative >= 0.99 * total:
+            p99 = value
+    mean = sum(value * n for value, n in histogram.items()) / total
+    return {"count": total, "mean": mean, "p50": p50, "p99": p99, "max": values[-1]}
+
+def _timed(op, func, timer):
+    clock = time.perf_counter_ns
+
+    def wrapper(*args):
+        start = clock()
+        try:
+            return func(*args)
+        finally:
+            timer(op, clock() - start)
+    return wrapper
+
+def instrument(obj, stats, methods):
+    """
+    Shadow obj's methods with the counting versions in 'methods' ({name: bound method}), wrapped
+    with stats.timer when one is set
+    """
+    for name, func in methods.items():
+        setattr(obj, name, _timed(name, func, stats.timer) if stats.timer else func)
+
+def uninstrument(obj, names):
+    for name in names:
+        obj.__dict__.pop(name, None)
+
+def measure_fpr(structure, negatives, lookup=None):
+    """
+    Measured false-positive rate: share of 'negatives' (usernames known to be absent, the
+    ground-truth sample) that the structure reports as present
+    """
+    negatives = list(negatives)
+    if not negatives:
+        return 0.0
+    if lookup is None and hasattr(structure, "contains_many"):
+        return float(sum(structure.contains_many(negatives))) / len(negatives)
+    lookup = lookup or structure.contains
+    return sum(bool(lookup(name)) for name in negatives) / len(negatives)
@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import tempfile
+from data_structures.bench import STRUCTURES, benchmark, compare, run, write_csv, write_json
+
+class TestBench(unittest.TestCase):
+
+    def test_benchmark_record(self): # every structure reports build time, latency percentiles and throughput
+        for name in STRUCTURES:
+            result = benchmark(name, 500, number=100, repeats=2)
+            print(f"\nBenchmark {name} with n=500 → p50 positive={result['positive']['p50_ns']:.0f}ns")
+            self.assertEqual((result["structure"], result["n"], result["lookups"]), (name, 500, 100))
+            self.assertGreater(result["throughput_ops_s"], 0)
+            self.assertGreater(result["build_keys_per_s"], 0)
+            self.assertGreater(result["bytes_per_key"], 0)
+            for kind in ("positive", "negative"):
+                self.assertLessEqual(result[kind]["p50_ns"], result[kind]["p95_ns"])
+                self.assertLessEqual(result[kind]["p95_ns"], result[kind]["p99_ns"])
+
+    def test_trace_memory(self): # tracemalloc peak of the build is recorded on request
+        result = benchmark("hash", 500, number=50, repeats=1, trace_memory=True)
+        print(f"\nHashTable build with n=500 → peak {result['tracemalloc_peak_bytes']} bytes, {result['bytes_per_key']:.1f} bytes/key")
+        self.assertGreater(result["tracemalloc_peak_bytes"], result["memory_bytes"] // 2)
+        if "peak_rss_bytes" in result: # measured in a fresh process, not inherited from earlier builds
+            self.assertGreaterEqual(result["build_rss_bytes"], 0)
+            self.assertGreater(result["peak_rss_bytes"], result["build_rss_bytes"])
+        self.assertNotIn("peak_rss_bytes", benchmark("hash", 500, number=50, repeats=1))
+
+    def test_cache(self): # cached latencies and the cache's hit rate are recorded
+        result = benchmark("hash", 500, number=100, repeats=3, distribution="zipf", cache_size=64)
+        print(f"\nCached HashTable with n=500 → hit rate {result['cache']['hit_rate']:.1%}")
+        self.assertGreater(result["cache"]["hit_rate"], 0)
+        self.assertGreater(result["cached_throughput_ops_s"], 0)
+        self.assertIn("p99_ns", result["cached_positive"])
+
+    def test_stats(self): # opt-in statistics and the measured FPR are recorded
+        result = benchmark("bloom", 500, number=100, repeats=1, stats=True)
+        print(f"\nBloom with n=500 → measured FPR {result['stats']['measured_fpr']:.3f}")
+        self.assertEqual(result["stats"]["lookups"], 100)
+        self.assertIn("bits_probed", result["stats"])
+        self.assertLess(result["stats"]["measured_fpr"], 0.1)
+
+    def test_compare_flags_regressions(self): # slower runs are reported against the baseline
+        baseline = run(["hash"], [500], number=100, repeats=2)
+        slower = json.loads(json.dumps(baseline))
+        slower[0]["positive"]["p50_ns"] = baseline[0]["positive"]["p50_ns"] * 2
+        self.assertEqual(compare(baseline, baseline), [])
+        self.assertEqual(len(compare(slower, baseline, threshold=0.10)), 1)
+
+    def test_outputs(self): # JSON and CSV files are written
+        results = run(["binary"], [200], number=50, repeats=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_json(results, os.path.join(tmp, "results.json"))
+            write_csv(results, os.path.join(tmp, "results.csv"))
+            with open(os.path.join(tmp, "results.json")) as f:
+                self.assertEqual(json.load(f), results)
+            with open(os.path.join(tmp, "results.csv")) as f:
+                self.assertIn("positive_p99_ns", f.readline())
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
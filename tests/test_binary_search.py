@@ -1,7 +1,7 @@
 import unittest
 import random
 import string
-from data_structures.Binary_search import binary_search, benchmark_binary_search
+from data_structures.Binary_search import binary_search, benchmark_binary_search, SortedIndex, sorted_list_memory_usage
 
 class TestBinarySearch(unittest.TestCase):
 
@@ -22,6 +22,28 @@ class TestBinarySearch(unittest.TestCase):
         print(f"\nBinary Search absent username: {self.target_absent} → {result}")
         self.assertFalse(result)
 
+    def test_sorted_index_contains_many(self): # Eytzinger batch search agrees with binary search
+        index = SortedIndex(self.usernames)
+        names = self.usernames[::7] + [self.target_absent, self.usernames[0] + "x", ""]
+        result = index.contains_many(names)
+        print(f"\nSortedIndex batch lookup of {len(names)} usernames → {int(result.sum())} found")
+        self.assertEqual(result.tolist(), [binary_search(self.usernames, u) for u in names])
+        self.assertTrue(index.contains(self.target_exists))
+
+    def test_sorted_index_queries(self): # rank, range and prefix queries
+        index = SortedIndex(self.usernames)
+        self.assertEqual(index.rank(self.target_exists), 1000)
+        self.assertEqual(index.range(self.usernames[10], self.usernames[20]), self.usernames[10:20])
+        prefix = self.target_exists[:2]
+        self.assertEqual(index.prefix(prefix), [u for u in self.usernames if u.startswith(prefix)])
+
+    def test_memory_usage(self): # the packed index is far smaller than the list of str
+        listed = sorted_list_memory_usage(self.usernames)
+        packed = SortedIndex(self.usernames).memory_usage()
+        print(f"\nSorted list → {listed['bytes_per_item']:.1f} bytes/username, SortedIndex → {packed['bytes_per_item']:.1f}")
+        self.assertEqual(listed["items"], packed["items"])
+        self.assertLess(packed["bytes"], listed["bytes"])
+
     def test_benchmark_small(self): # testing small amount of usernames
         n = 2000
         t = benchmark_binary_search(n)
@@ -1,7 +1,9 @@
 import unittest
+import os
 import random
 import string
-from data_structures.Bloom import BloomFilter, benchmark_bloom_filter
+import tempfile
+from data_structures.Bloom import BloomFilter, ScalableBloomFilter, benchmark_bloom_filter
 
 class TestBloomFilter(unittest.TestCase):
 
@@ -31,6 +33,95 @@ class TestBloomFilter(unittest.TestCase):
         # Bloom filter may have false positives, but never false negatives
         self.assertIn(result, [True, False])  
 
+    def test_add_many_check_many(self): # batch insert/lookup agrees with the single-item API
+        bloom = BloomFilter(self.m, self.k)
+        bloom.add_many(self.usernames)
+        self.assertEqual(bloom.bit_array, self.bloom.bit_array)
+
+        sparse = BloomFilter(self.m, self.k) # small batches take the bitwise_or.at path
+        for i in range(0, self.n, 10):
+            sparse.add_many(self.usernames[i:i + 10])
+        self.assertEqual(sparse.bit_array, self.bloom.bit_array)
+
+        names = self.usernames[:100] + [self.target_absent]
+        result = bloom.check_many(names)
+        print(f"\nBloom Filter batch lookup of {len(names)} usernames → {int(result.sum())} found")
+        self.assertTrue(result[:100].all())
+        self.assertEqual(result.tolist(), [bloom.check(u) for u in names])
+
+    def test_save_open(self): # file round trip, memory-mapped read-only
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "usernames.bloom")
+            self.bloom.save(path)
+
+            loaded = BloomFilter.open(path)
+            self.assertEqual((loaded.size, loaded.hash_count, loaded.count), (self.m, self.k, self.n))
+            self.assertTrue(loaded.check(self.target_exists))
+            self.assertTrue(loaded.check_many(self.usernames).all())
+            with self.assertRaises(TypeError):
+                loaded.add(self.target_absent) # read-only mapping
+            loaded.close()
+
+    def test_from_fpr(self): # m and k chosen from expected items and target FPR
+        bloom = BloomFilter.from_fpr(self.n, target_fpr=0.01)
+        bloom.add_many(self.usernames)
+        print(f"\nBloom Filter sized for n={self.n}, p=0.01 → m={bloom.size}, k={bloom.hash_count}")
+        self.assertEqual(bloom.hash_count, 7)
+        self.assertLess(bloom.size, self.n * 10)
+        self.assertAlmostEqual(bloom.estimated_fpr(), 0.01, delta=0.001)
+
+    def test_scalable(self): # chains sub-filters without false negatives
+        sbf = ScalableBloomFilter(initial_capacity=100, target_fpr=0.01)
+        sbf.add_many(self.usernames[:1000])
+        for u in self.usernames[1000:]:
+            sbf.add(u)
+        print(f"\nScalable Bloom Filter with {len(sbf)} usernames → {len(sbf.filters)} sub-filters, est. FPR={sbf.estimated_fpr():.4f}")
+        self.assertEqual(len(sbf), self.n)
+        self.assertGreater(len(sbf.filters), 1)
+        self.assertTrue(sbf.check_many(self.usernames).all())
+        self.assertLessEqual(sbf.estimated_fpr(), 0.01)
+
+    def test_union_intersection(self): # merging filters built from different usernames
+        first, second = BloomFilter(self.m, self.k), BloomFilter(self.m, self.k)
+        first.add_many(self.usernames[:1000])
+        second.add_many(self.usernames[1000:])
+
+        merged = first | second
+        self.assertEqual(merged.bit_array, self.bloom.bit_array)
+        self.assertTrue((first & self.bloom).check_many(self.usernames[:1000]).all())
+        first |= second
+        self.assertEqual(first.bit_array, self.bloom.bit_array)
+        with self.assertRaises(ValueError):
+            first | BloomFilter(self.m, self.k + 1)
+
+    def test_merge_opened(self): # a saved per-region filter merges with an in-memory one
+        first, second = BloomFilter.from_fpr(1000, 0.01), BloomFilter.from_fpr(1000, 0.01)
+        self.assertNotEqual(first.size % 8, 0)
+        first.add_many(self.usernames[:500])
+        second.add_many(self.usernames[500:1000])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "region.bloom")
+            first.save(path)
+            opened = BloomFilter.open(path)
+            for merged in (opened | second, second | opened, opened & second, opened.copy()):
+                self.assertEqual(len(merged.bit_array), first.size)
+            self.assertTrue((opened | second).check_many(self.usernames[:1000]).all())
+            merged = second.copy()
+            merged |= opened
+            self.assertEqual(merged.bit_array, (first | second).bit_array)
+            opened.close()
+
+    def test_build_parallel(self): # multi-process build gives the same bits as a serial build
+        bloom = BloomFilter.build_parallel(self.usernames, workers=2, size=self.m, hash_count=self.k)
+        print(f"\nParallel Bloom Filter build of {bloom.count} usernames")
+        self.assertEqual(bloom.bit_array, self.bloom.bit_array)
+        self.assertEqual(bloom.count, self.n)
+
+    def test_memory_usage(self): # m bits for n usernames
+        usage = self.bloom.memory_usage()
+        print(f"\nBloom Filter memory → {usage['bytes_per_item']:.2f} bytes per username")
+        self.assertEqual(usage, {"bytes": self.m // 8, "items": self.n, "bytes_per_item": self.m / 8 / self.n})
+
     def test_benchmark_small(self):
         n = 2000
         t = benchmark_bloom_filter(n)
@@ -0,0 +1,84 @@
+import unittest
+from data_structures.cache import CachedMembership, CountMinSketch
+from data_structures.Binary_search import binary_search
+from data_structures.Hash import HashTable
+from data_structures.Bloom import BloomFilter
+from data_structures.Cuckoo import CuckooFilter
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        """Usernames in a HashTable."""
+        self.usernames = [f"user{i}" for i in range(1000)]
+        self.ht = HashTable(size=2000)
+        for u in self.usernames:
+            self.ht.insert(u)
+
+    def test_lru(self): # repeated lookups hit, the least recently used username is evicted
+        cached = CachedMembership(self.ht, maxsize=2)
+        self.assertTrue(cached.contains("user1"))
+        self.assertTrue(cached.contains("user1"))
+        self.assertFalse(cached.contains("missing"))
+        self.assertTrue(cached.contains("user1")) # user1 is now the most recently used
+        self.assertTrue(cached.contains("user2")) # evicts "missing"
+        stats = cached.stats()
+        print(f"\nLRU cache stats: {stats}")
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 1))
+        self.assertEqual(list(cached._cache), ["user1", "user2"])
+
+    def test_invalidation(self): # mutations never leave a stale answer behind
+        cached = CachedMembership(self.ht, maxsize=10)
+        self.assertFalse(cached.contains("newuser"))
+        cached.insert("newuser")
+        self.assertTrue(cached.contains("newuser"))
+        cached.delete("newuser")
+        self.assertFalse(cached.contains("newuser"))
+
+        cf = CuckooFilter(100)
+        cached = CachedMembership(cf, maxsize=10)
+        self.assertFalse(cached.contains("alice"))
+        cached.add("alice")
+        self.assertTrue(cached.contains("alice"))
+        cached.delete("alice")
+        self.assertFalse(cached.contains("alice"))
+
+    def test_tinylfu(self): # one-off usernames do not flush popular ones
+        cached = CachedMembership(self.ht, maxsize=10, policy="tinylfu")
+        hot = self.usernames[:10]
+        for _ in range(5):
+            for u in hot:
+                cached.contains(u)
+        for u in self.usernames[10:500]: # a scan of names looked up only once
+            cached.contains(u)
+        self.assertEqual(set(cached._cache), set(hot))
+        self.assertGreater(cached.stats()["rejections"], 0)
+
+    def test_contains_many_and_lookup(self): # batches and structures without a contains method
+        bf = BloomFilter.from_fpr(1000)
+        bf.add_many(self.usernames)
+        cached = CachedMembership(bf, maxsize=100)
+        self.assertTrue(cached.contains_many(self.usernames[:50]).all())
+        self.assertTrue(cached.contains_many(self.usernames[:50]).all())
+        self.assertEqual(cached.stats()["hits"], 50)
+
+        sorted_list = sorted(self.usernames)
+        cached = CachedMembership(sorted_list, maxsize=100, lookup=lambda u: binary_search(sorted_list, u))
+        self.assertEqual(cached.contains_many(["user5", "nobody"]).tolist(), [True, False])
+
+        cached = CachedMembership(self.ht, maxsize=2) # a name repeated within one batch is admitted once
+        cached.contains("user1")
+        self.assertEqual(cached.contains_many(["user2", "user2"]).tolist(), [True, True])
+        self.assertEqual(list(cached._cache), ["user1", "user2"])
+        self.assertEqual(cached.stats()["evictions"], 0)
+
+    def test_count_min_sketch(self): # estimates never undercount, and age over time
+        sketch = CountMinSketch(width=64, sample_size=100)
+        for _ in range(20):
+            sketch.increment("popular")
+        self.assertGreaterEqual(sketch.estimate("popular"), 20)
+        for i in range(80):
+            sketch.increment(f"other{i}")
+        self.assertLessEqual(sketch.estimate("popular"), 15)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
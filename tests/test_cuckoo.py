@@ -1,6 +1,8 @@
 import unittest
+import os
 import random
 import string
+import tempfile
 from data_structures.Cuckoo import CuckooFilter, benchmark_cuckoo_filter
 
 class TestCuckooFilter(unittest.TestCase):
@@ -29,6 +31,104 @@ class TestCuckooFilter(unittest.TestCase):
         # Cuckoo filter also may return false positives
         self.assertIn(result, [True, False])
 
+    def test_compact_storage(self): # fingerprints live in one flat integer array
+        cf = CuckooFilter(1024, bucket_size=4, fingerprint_bits=8)
+        for u in self.usernames:
+            self.assertTrue(cf.insert(u))
+        bytes_per_item = cf.memory_usage()["bytes_per_item"]
+        print(f"\nCuckoo Filter with 8-bit fingerprints → {bytes_per_item:.2f} bytes per username")
+        self.assertEqual(cf.table.itemsize, 1)
+        self.assertLess(bytes_per_item, 4)
+        self.assertTrue(all(cf.lookup(u) for u in self.usernames))
+        with self.assertRaises(ValueError): # 12 bits would sit in 16-bit slots
+            CuckooFilter(1024, fingerprint_bits=12)
+
+    def test_delete(self): # deleted usernames are gone, the rest are still found
+        for u in self.usernames[:1000]:
+            self.assertTrue(self.cf.delete(u))
+        print(f"\nCuckoo Filter after 1000 deletes → {self.cf.count} usernames, load factor={self.cf.load_factor:.3f}")
+        self.assertEqual(self.cf.count, 1000)
+        self.assertTrue(all(self.cf.lookup(u) for u in self.usernames[1000:]))
+        self.assertLess(sum(self.cf.lookup(u) for u in self.usernames[:1000]), 10)
+
+    def test_stash_keeps_fingerprints(self): # a failed kick chain never loses an inserted username
+        cf = CuckooFilter(64, bucket_size=2, max_kicks=20)
+        inserted = [u for u in self.usernames[:200] if cf.insert(u)]
+        self.assertLess(len(inserted), 200)
+        self.assertEqual(len(cf.stash), cf.stash_size)
+        self.assertEqual(cf.count, len(inserted))
+        self.assertTrue(all(cf.lookup(u) for u in inserted))
+
+    def test_auto_resize(self): # table grows instead of rejecting inserts
+        cf = CuckooFilter(64, bucket_size=2, auto_resize=True, max_load_factor=0.9)
+        self.assertTrue(all(cf.insert(u) for u in self.usernames))
+        print(f"\nCuckoo Filter grown to {cf.capacity} slots → load factor={cf.load_factor:.3f}, kicks={dict(cf.kick_histogram)}")
+        self.assertLessEqual(cf.load_factor, 0.9)
+        self.assertEqual(sum(cf.kick_histogram.values()) + cf.failed_chains, len(self.usernames))
+        self.assertEqual(len(cf), len(self.usernames))
+        self.assertTrue(all(cf.lookup(u) for u in self.usernames))
+
+    def test_growth_keeps_buckets_small(self): # growing adds tables instead of widening buckets
+        cf = CuckooFilter(16, bucket_size=4, auto_resize=True)
+        names = [f"user{i}" for i in range(20000)]
+        cf.insert_many(names[:10000])
+        for u in names[10000:]:
+            cf.insert(u)
+        absent = [f"absent{i}" for i in range(20000)]
+        fpr = cf.contains_many(absent).mean()
+        print(f"\nGrown Cuckoo Filter → {1 + len(cf._older)} tables, FPR={fpr:.5f}")
+        self.assertEqual(cf.bucket_size, 4)
+        self.assertEqual(len(cf), 20000)
+        self.assertTrue(cf.contains_many(names).all())
+        self.assertTrue(all(cf.lookup(u) for u in names[::7]))
+        self.assertLess(fpr, 0.005)
+        self.assertEqual(cf.contains_many(absent[:500]).tolist(), [cf.lookup(u) for u in absent[:500]])
+        self.assertTrue(all(cf.delete(u) for u in names[:5000]))
+        self.assertEqual(len(cf), 15000)
+        self.assertTrue(cf.contains_many(names[5000:]).all())
+        with tempfile.TemporaryDirectory() as tmp: # every table survives a round trip
+            path = os.path.join(tmp, "grown.cuckoo")
+            cf.save(path)
+            loaded = CuckooFilter.load(path)
+            self.assertEqual((len(loaded), len(loaded._older)), (len(cf), len(cf._older)))
+            self.assertTrue(loaded.contains_many(names[5000:]).all())
+
+    def test_insert_many_contains_many(self): # batch API agrees with the single-item API
+        cf = CuckooFilter(self.capacity)
+        self.assertEqual(cf.insert_many(self.usernames), len(self.usernames))
+        names = self.usernames[:100] + [self.target_absent]
+        result = cf.contains_many(names)
+        print(f"\nCuckoo Filter batch lookup of {len(names)} usernames → {int(result.sum())} found")
+        self.assertTrue(cf.contains_many(self.usernames).all())
+        self.assertEqual(result.tolist(), [cf.lookup(u) for u in names])
+
+    def test_save_load(self): # parameters, table and stash survive a round trip
+        cf = CuckooFilter(64, bucket_size=2, max_kicks=20, fingerprint_bits=8)
+        inserted = [u for u in self.usernames[:200] if cf.insert(u)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "usernames.cuckoo")
+            cf.save(path)
+            loaded = CuckooFilter.load(path)
+            self.assertEqual((loaded.bucket_count, loaded.bucket_size, loaded.fingerprint_bits, loaded.count),
+                             (cf.bucket_count, cf.bucket_size, cf.fingerprint_bits, cf.count))
+            self.assertEqual((loaded.table, loaded.stash), (cf.table, cf.stash))
+            self.assertTrue(all(loaded.lookup(u) for u in inserted))
+            self.assertTrue(loaded.delete(inserted[0]))
+
+            with open(path, 'r+b') as f: # flip one bit of the seed in the header
+                f.seek(40)
+                byte = f.read(1)
+                f.seek(40)
+                f.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                CuckooFilter.load(path)
+
+            cf.save(path)
+            with open(path, 'r+b') as f: # truncate the file
+                f.truncate(os.path.getsize(path) - 1)
+            with self.assertRaises(ValueError):
+                CuckooFilter.load(path)
+
     def test_benchmark_small(self): # testing small amount of usernames
         n = 2000
         t = benchmark_cuckoo_filter(n)
@@ -0,0 +1,43 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from data_structures.dataset import generate_usernames, load_dataset, lookup_set, to_list
+
+class TestDataset(unittest.TestCase):
+
+    def test_seeded_unique(self): # same seed, same usernames; every username is unique
+        first, second = generate_usernames(5000, seed=7), generate_usernames(5000, seed=7)
+        print(f"\nGenerated usernames: {to_list(first[:3])}")
+        self.assertTrue((first == second).all())
+        self.assertFalse((first == generate_usernames(5000, seed=8)).all())
+        self.assertEqual(len(np.unique(first)), 5000)
+
+    def test_variable_length(self): # prefix length drawn from a range, still unique
+        names = to_list(generate_usernames(1000, seed=1, length=(3, 8)))
+        prefixes = [len(u) - 3 for u in names] # index zero-padded to 3 digits
+        self.assertEqual((min(prefixes), max(prefixes)), (3, 8))
+        self.assertEqual(names[7][-3:], "007")
+        short = generate_usernames(200000, seed=0, length=(1, 3))
+        self.assertEqual(len(np.unique(short)), 200000)
+
+    def test_lookup_set(self): # positives are present, negatives are absent, zipf is skewed
+        usernames = generate_usernames(5000, seed=1)
+        lookups, is_positive = lookup_set(usernames, 1000, distribution="zipf", seed=2)
+        self.assertEqual((len(lookups), int(is_positive.sum())), (1000, 500))
+        self.assertTrue(np.isin(lookups[is_positive], usernames).all())
+        self.assertFalse(np.isin(lookups[~is_positive], usernames).any())
+        self.assertLess(len(np.unique(lookups[is_positive])), 400)
+
+    def test_cache(self): # second load comes from the .npy cache
+        with tempfile.TemporaryDirectory() as tmp:
+            names, lookups, is_positive = load_dataset(2000, number=100, seed=3, cache_dir=tmp)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+            cached = load_dataset(2000, number=100, seed=3, cache_dir=tmp)
+            self.assertTrue((cached[0] == names).all())
+            self.assertTrue((cached[1] == lookups).all())
+            self.assertTrue((cached[2] == is_positive).all())
+            del names, cached # release the memory maps before the directory is removed
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
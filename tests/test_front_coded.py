@@ -0,0 +1,57 @@
+import unittest
+import os
+import random
+import string
+import tempfile
+from data_structures.Front_coded import FrontCodedDict
+
+class TestFrontCodedDict(unittest.TestCase):
+
+    def setUp(self):
+        """Write a front-coded dictionary of sorted random usernames."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = sorted([''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(2000)])
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "usernames.fcd")
+        self.fcd = FrontCodedDict.build(self.path, iter(self.usernames), block_size=16)
+
+        self.target_exists = self.usernames[1000]
+        self.target_absent = ''.join(random.choice(self.chars) for _ in range(8))
+
+    def tearDown(self):
+        self.fcd.close()
+        self.tmp.cleanup()
+
+    def test_found(self): # testing usernames that exist
+        result = self.fcd.contains(self.target_exists)
+        print(f"\nFront-coded dictionary existing username: {self.target_exists} → {result}")
+        self.assertTrue(result)
+        self.assertTrue(self.fcd.contains_many(self.usernames).all())
+
+    def test_not_found(self): # testing usernames that don't exist
+        result = self.fcd.contains(self.target_absent)
+        print(f"\nFront-coded dictionary absent username: {self.target_absent} → {result}")
+        self.assertFalse(result)
+        self.assertFalse(self.fcd.contains(""))
+        self.assertFalse(self.fcd.contains(self.usernames[-1] + "z"))
+
+    def test_round_trip(self): # reopening the file decodes every username in order
+        reopened = FrontCodedDict(self.path)
+        size = os.path.getsize(self.path)
+        print(f"\nFront-coded dictionary of {len(reopened)} usernames → {size / len(reopened):.2f} bytes per username")
+        self.assertEqual(list(reopened), self.usernames)
+        self.assertEqual(len(reopened.heads), 2000 // 16)
+        reopened.close()
+
+    def test_empty_head(self): # a single block whose head is the empty username
+        fcd = FrontCodedDict.build(os.path.join(self.tmp.name, "empty.fcd"), ["", "b", "bba"], block_size=32)
+        self.assertEqual(list(fcd), ["", "b", "bba"])
+        self.assertEqual(fcd.contains_many(["", "b", "bba", "ba"]).tolist(), [True, True, True, False])
+        fcd.close()
+
+    def test_unsorted_input(self): # the builder rejects unsorted input
+        with self.assertRaises(ValueError):
+            FrontCodedDict.build(os.path.join(self.tmp.name, "bad.fcd"), ["b", "a"])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
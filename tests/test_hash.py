@@ -1,30 +1,9 @@
 import unittest
+import os
 import random
 import string
-from data_structures.Hash import HashTable
-
-# helper benchmark for HashTable (same style as others)
-def benchmark_hash(n):
-    chars = string.ascii_lowercase + string.digits
-    usernames = [''.join(random.choice(chars) for _ in range(5)) + str(i) for i in range(n)]
-
-    ht = HashTable(size=2 * n)
-    for name in usernames:
-        ht.insert(name)
-
-    # Lookup set: half present, half absent
-    lookups = min(1000 // 2, len(usernames))
-    negatives = 1000 - lookups
-
-    lookup_names = random.sample(usernames, lookups)
-    lookup_names += [''.join(random.choice(chars) for _ in range(5)) for _ in range(negatives)]
-
-    import time
-    start = time.perf_counter_ns()
-    for name in lookup_names:
-        ht.contains(name)
-    total_time = time.perf_counter_ns() - start
-    return (total_time / len(lookup_names)) / 1e9
+import tempfile
+from data_structures.Hash import FrozenHashTable, HashTable, OpenAddressingHashTable, benchmark_hash_table
 
 
 class TestHashTable(unittest.TestCase):
@@ -52,15 +31,119 @@ class TestHashTable(unittest.TestCase):
         print(f"\nHashTable absent username: {self.target_absent} → {result}")
         self.assertFalse(result)
 
+    def test_key_value(self): # username -> record map with delete and iteration
+        for engine in ("chaining", "open"):
+            ht = HashTable(engine=engine)
+            for i, u in enumerate(self.usernames):
+                ht.put(u, {"id": i})
+            ht.put(self.target_exists, {"id": -1})
+            self.assertEqual(len(ht), self.n)
+            self.assertEqual(ht.get(self.target_exists), {"id": -1})
+            self.assertEqual(ht.get(self.usernames[0]), {"id": 0})
+            self.assertIsNone(ht.get(self.target_absent))
+            self.assertTrue(ht.delete(self.target_exists))
+            self.assertFalse(ht.delete(self.target_exists))
+            self.assertNotIn(self.target_exists, ht)
+            self.assertEqual(sorted(ht), sorted(set(self.usernames) - {self.target_exists}))
+
+    def test_incremental_rehash(self): # growing moves a few buckets per operation
+        ht = HashTable(size=16, max_load_factor=1.0)
+        rehashing = 0
+        for u in self.usernames:
+            ht.insert(u)
+            rehashing += ht._old is not None
+            self.assertLessEqual(len(ht), ht.size)
+        print(f"\nHashTable grown from 16 to {ht.size} buckets, {rehashing} inserts ran during a rehash")
+        self.assertGreater(rehashing, 0)
+        self.assertTrue(all(ht.contains(u) for u in self.usernames))
+        self.assertEqual(sorted(ht), sorted(self.usernames))
+
+    def test_memory_usage(self): # deep size grows with the stored keys
+        usage = self.ht.memory_usage()
+        print(f"\nHashTable memory → {usage['bytes_per_item']:.1f} bytes per username")
+        self.assertEqual(usage["items"], self.n)
+        self.assertGreater(usage["bytes"], sum(len(u) for u in self.usernames))
+
+    def test_open_addressing(self): # open-addressing engine grows with the stored keys
+        ht = HashTable(engine="open", max_load_factor=0.7)
+        self.assertIsInstance(ht, OpenAddressingHashTable)
+        for u in self.usernames:
+            ht.insert(u)
+        print(f"\nOpen-addressing HashTable with {ht.count} usernames → {ht.size} slots")
+        self.assertEqual(ht.count, self.n)
+        self.assertLessEqual(ht.count, 0.7 * ht.size)
+        self.assertLess(ht.size, 4 * self.n)
+        self.assertTrue(all(ht.contains(u) for u in self.usernames))
+        self.assertFalse(ht.contains(self.target_absent))
+
+    def test_open_addressing_load_factor(self): # a full table would never end a miss's probe
+        for factor in (0, 1.0, 1.5):
+            with self.assertRaises(ValueError):
+                HashTable(8, engine="open", max_load_factor=factor)
+        ht = HashTable(8, engine="open", max_load_factor=0.99)
+        for u in self.usernames[:8]:
+            ht.insert(u)
+        self.assertLess(ht.count, ht.size)
+        self.assertFalse(ht.contains(self.target_absent))
+
+    def test_open_addressing_delete(self): # backward-shift deletion keeps probe chains intact
+        ht = HashTable(engine="open")
+        for u in self.usernames:
+            ht.insert(u)
+        for u in self.usernames[::2]:
+            self.assertTrue(ht.delete(u))
+        self.assertFalse(ht.delete(self.target_absent))
+        self.assertEqual(ht.count, self.n // 2)
+        self.assertFalse(any(ht.contains(u) for u in self.usernames[::2]))
+        self.assertTrue(all(ht.contains(u) for u in self.usernames[1::2]))
+
+    def test_save_load(self): # snapshot round trip through a memory-mapped, read-only view
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "usernames.htbl")
+            self.ht.save(path)
+            frozen = HashTable.load(path)
+            self.assertIsInstance(frozen, FrozenHashTable)
+            self.assertEqual(len(frozen), self.n)
+            self.assertTrue(frozen.contains_many(self.usernames).all())
+            self.assertFalse(frozen.contains(self.target_absent))
+            self.assertEqual(sorted(frozen), sorted(self.usernames))
+            thawed = frozen.thaw(engine="open")
+            thawed.insert(self.target_absent)
+            self.assertTrue(thawed.contains(self.target_absent) and thawed.contains(self.target_exists))
+            frozen.close()
+
+            with open(path, 'r+b') as f: # flip one key byte
+                f.seek(-3, os.SEEK_END)
+                byte = f.read(1)
+                f.seek(-3, os.SEEK_END)
+                f.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                HashTable.load(path)
+
+            self.ht.save(path)
+            with open(path, 'r+b') as f: # flip one bit of the max load factor in the header
+                f.seek(24)
+                byte = f.read(1)
+                f.seek(24)
+                f.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                HashTable.load(path)
+
+    def test_save_rejects_values(self): # only membership is stored
+        ht = HashTable(size=10)
+        ht.put("alice", {"id": 1})
+        with tempfile.TemporaryDirectory() as tmp, self.assertRaises(ValueError):
+            ht.save(os.path.join(tmp, "values.htbl"))
+
     def test_benchmark_small(self): # testing small amount of usernames
         n = 2000
-        t = benchmark_hash(n)
+        t = benchmark_hash_table(n)
         print(f"\nBenchmark HashTable with n={n} → avg lookup time={t:.6e} seconds")
         self.assertGreater(t, 0)
 
     def test_benchmark_large(self): # testing large amount of usernames
         n = 20000
-        t = benchmark_hash(n)
+        t = benchmark_hash_table(n)
         print(f"\nBenchmark HashTable with n={n} → avg lookup time={t:.6e} seconds")
         self.assertGreater(t, 0)
 
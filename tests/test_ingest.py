@@ -0,0 +1,84 @@
+import unittest
+import os
+import random
+import string
+import tempfile
+import numpy as np
+from data_structures.ingest import chunked, external_sort, ingest, merge_runs, read_usernames, sorted_runs
+from data_structures.Linear_search import ScanEngine
+from data_structures.Binary_search import SortedIndex
+from data_structures.Front_coded import FrontCodedDict
+from data_structures.Hash import HashTable
+from data_structures.Bloom import BloomFilter, ScalableBloomFilter
+from data_structures.Cuckoo import CuckooFilter
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        """Random usernames (with a few duplicates) written to a text file and a .npy file."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = [''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(3000)]
+        self.usernames += self.usernames[:10]
+        random.shuffle(self.usernames)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.text_path = os.path.join(self.tmp.name, "usernames.txt")
+        with open(self.text_path, "w") as f:
+            f.write("\n".join(self.usernames) + "\n")
+        self.npy_path = os.path.join(self.tmp.name, "usernames.npy")
+        np.save(self.npy_path, np.array([u.encode() for u in self.usernames], dtype='S'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_and_chunk(self): # files stream back in order, in bounded chunks
+        self.assertEqual(list(read_usernames(self.text_path)), self.usernames)
+        self.assertEqual(list(read_usernames(self.npy_path, chunk_size=100)), self.usernames)
+        chunks = list(chunked(iter(self.usernames), 1000))
+        self.assertEqual([len(c) for c in chunks], [1000, 1000, 1000, 10])
+
+    def test_external_sort(self): # sorted and deduplicated with runs smaller than the input
+        self.assertEqual(list(external_sort(iter(self.usernames), chunk_size=256)), sorted(set(self.usernames)))
+        self.assertEqual(list(external_sort(iter([]), chunk_size=256)), [])
+
+    def test_multi_pass_merge(self): # more runs than the fan-in are merged in several passes
+        paths, count, _ = sorted_runs(self.usernames, self.tmp.name, chunk_size=16)
+        self.assertGreater(len(paths), 4 ** 3)
+        merged = [key.decode() for key in merge_runs(paths, fan_in=4)]
+        self.assertEqual(merged, sorted(set(self.usernames)))
+        self.assertEqual(count, len(self.usernames))
+
+    def test_from_iterable(self): # every structure builds from a generator in chunks
+        stream = lambda: (u for u in self.usernames)
+        structures = [
+            ScanEngine.from_iterable(stream(), chunk_size=500),
+            SortedIndex.from_iterable(stream(), chunk_size=500),
+            HashTable.from_iterable(stream(), size=64, chunk_size=500),
+            HashTable.from_iterable(stream(), chunk_size=500, engine="open"),
+            BloomFilter.from_iterable(stream(), len(self.usernames), chunk_size=500),
+            ScalableBloomFilter.from_iterable(stream(), chunk_size=500, initial_capacity=500),
+            CuckooFilter.from_iterable(stream(), len(self.usernames), chunk_size=500),
+        ]
+        for structure in structures:
+            self.assertTrue(structure.contains_many(self.usernames).all(), type(structure).__name__)
+        self.assertEqual(len(structures[1]), 3000) # duplicates dropped by the external sort
+        self.assertEqual(structures[1].keys.tolist(), sorted(u.encode() for u in set(self.usernames)))
+        self.assertEqual(ingest(HashTable(100), stream(), chunk_size=7), len(self.usernames))
+        grown = ScanEngine.from_iterable(iter(["a"] * 300 + ["longer-name"] * 300), chunk_size=256)
+        self.assertEqual((len(grown), grown.data.dtype.itemsize), (600, 11)) # doubled, widened and trimmed
+        self.assertEqual(grown.data.tolist(), [b"a"] * 300 + [b"longer-name"] * 300)
+
+    def test_from_file(self): # text and .npy files, including the on-disk dictionary
+        for path in (self.text_path, self.npy_path):
+            self.assertTrue(SortedIndex.from_file(path, chunk_size=700).contains_many(self.usernames).all())
+            self.assertTrue(CuckooFilter.from_file(path).contains_many(self.usernames).all())
+            self.assertEqual(len(HashTable.from_file(path)), 3000)
+            engine = ScanEngine.from_file(path, chunk_size=700)
+            self.assertEqual(engine.data.tolist(), [u.encode() for u in self.usernames]) # filled in place
+        bf = BloomFilter.from_file(self.text_path)
+        self.assertTrue(bf.check_many(self.usernames).all())
+        fcd = FrontCodedDict.from_file(os.path.join(self.tmp.name, "usernames.fcd"), self.text_path, chunk_size=700)
+        self.assertEqual(list(fcd), sorted(set(self.usernames)))
+        fcd.close()
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -1,7 +1,7 @@
 import unittest
 import random
 import string
-from data_structures.Linear_search import linear_search, benchmark_linear_search
+from data_structures.Linear_search import linear_search, benchmark_linear_search, ScanEngine
 
 class TestLinearSearch(unittest.TestCase):
 
@@ -24,6 +24,27 @@ class TestLinearSearch(unittest.TestCase):
         print(f"\nSearching for absent username: {self.target_absent} → {result}")
         self.assertFalse(result)
 
+    def test_scan_engine(self): # one vectorized pass for a batch of targets
+        engine = ScanEngine(self.usernames, chunk_size=128)
+        names = self.usernames[::50] + [self.target_absent, self.target_exists]
+        result = engine.contains_many(names)
+        print(f"\nScan engine batch lookup of {len(names)} usernames → {int(result.sum())} found")
+        self.assertEqual(result.tolist(), [linear_search(self.usernames, u) for u in names])
+
+    def test_scan_engine_parallel(self): # worker processes scan slices of a shared-memory copy
+        engine = ScanEngine(self.usernames, chunk_size=128)
+        names = self.usernames[::50] + [self.target_absent]
+        try:
+            self.assertEqual(engine.contains_many(names, workers=2).tolist(), engine.contains_many(names).tolist())
+        finally:
+            engine.close()
+
+    def test_prefix_substring(self): # predicates the other structures cannot answer
+        engine = ScanEngine(self.usernames)
+        part = self.target_exists[1:4]
+        self.assertEqual(engine.prefix(self.target_exists[:2]), [u for u in self.usernames if u.startswith(self.target_exists[:2])])
+        self.assertEqual(engine.substring(part), [u for u in self.usernames if part in u])
+
     def test_benchmark_small(self): # testing small amount of usernames
         n = 1000
         t = benchmark_linear_search(n)
@@ -0,0 +1,65 @@
+import unittest
+import os
+import random
+import string
+import tempfile
+from data_structures.membership import Membership, MutableMembership, TieredMembership
+from data_structures.Linear_search import ScanEngine
+from data_structures.Binary_search import SortedIndex
+from data_structures.Front_coded import FrontCodedDict
+from data_structures.Hash import HashTable
+from data_structures.Bloom import BloomFilter
+from data_structures.Cuckoo import CuckooFilter
+
+class TestMembership(unittest.TestCase):
+
+    def setUp(self):
+        """Random usernames plus absent lookups."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = [''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(2000)]
+        self.absent = [''.join(random.choice(self.chars) for _ in range(5)) for _ in range(2000)]
+
+    def test_protocol(self): # all five approaches answer through the same methods
+        ht = HashTable(size=4000)
+        bf = BloomFilter.from_fpr(2000)
+        cf = CuckooFilter(4000)
+        structures = [ScanEngine(self.usernames), SortedIndex(sorted(self.usernames)), ht, bf, cf]
+        for structure in (ht, bf, cf):
+            self.assertIsInstance(structure, MutableMembership)
+            for u in self.usernames:
+                structure.add(u)
+        for structure in structures:
+            self.assertIsInstance(structure, Membership)
+            self.assertTrue(structure.contains(self.usernames[7]))
+            self.assertTrue(structure.contains_many(self.usernames).all())
+
+    def test_tiered(self): # only filter positives reach the backend
+        bf = BloomFilter.from_fpr(2000, target_fpr=0.01)
+        ht = HashTable(size=4000)
+        tiered = TieredMembership(bf, ht)
+        for u in self.usernames:
+            tiered.add(u)
+        result = tiered.contains_many(self.usernames + self.absent)
+        stats = tiered.stats()
+        print(f"\nTiered membership stats: {stats}")
+        self.assertEqual(result.tolist(), [True] * 2000 + [False] * 2000)
+        self.assertEqual(stats["queries"], 4000)
+        self.assertEqual(stats["backend_hits"], 2000)
+        self.assertEqual(stats["filter_negatives"] + stats["backend_queries"], 4000)
+        self.assertLess(stats["observed_fpr"], 0.05)
+        self.assertFalse(tiered.contains(self.absent[0]))
+
+    def test_tiered_read_only_backend(self): # cuckoo pre-filter over a memory-mapped sorted file
+        cf = CuckooFilter(2048, bucket_size=4)
+        cf.insert_many(self.usernames)
+        with tempfile.TemporaryDirectory() as tmp:
+            fcd = FrontCodedDict.build(os.path.join(tmp, "usernames.fcd"), sorted(self.usernames))
+            tiered = TieredMembership(cf, fcd)
+            self.assertTrue(all(tiered.contains(u) for u in self.usernames[:100]))
+            self.assertFalse(any(tiered.contains_many(self.absent)))
+            with self.assertRaises(TypeError):
+                tiered.add("newuser")
+            fcd.close()
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+from data_structures import dataset
+from data_structures.server import BUILDERS, MembershipServer, load_test
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        """Usernames and a half present lookup set."""
+        self.names = dataset.generate_usernames(2000, seed=3)
+        self.lookups, self.is_positive = dataset.lookup_set(self.names, 400, seed=4)
+
+    def run_with_server(self, structure, client, **kwargs):
+        async def scenario():
+            server = MembershipServer(structure, **kwargs)
+            await server.start(port=0)
+            try:
+                return server, await client(server)
+            finally:
+                await server.close()
+        return asyncio.run(scenario())
+
+    def test_batched_answers(self): # concurrent lookups are answered in batches, in order
+        async def client(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"".join(b"contains " + name + b"\n" for name in self.lookups.tolist()))
+            await writer.drain()
+            answers = [await reader.readline() for _ in range(len(self.lookups))]
+            writer.write(b"add newuser\ncontains newuser\nfrobnicate x\n")
+            extra = [await reader.readline() for _ in range(3)]
+            writer.close()
+            return answers, extra
+
+        server, (answers, extra) = self.run_with_server(BUILDERS["hash"](dataset.to_list(self.names)), client)
+        print(f"\nServer stats: {server.stats()}")
+        self.assertEqual(answers, [b"1\n" if p else b"0\n" for p in self.is_positive])
+        self.assertEqual(extra[:2], [b"OK\n", b"1\n"])
+        self.assertTrue(extra[2].startswith(b"ERR"))
+        self.assertLess(server.batches, len(self.lookups))
+
+    def test_coalescing(self): # identical in-flight lookups share one probe
+        async def client(server):
+            return await asyncio.gather(*(server.contains("popular") for _ in range(50)))
+
+        server, answers = self.run_with_server(BUILDERS["binary"](["popular", "other"]), client)
+        self.assertEqual(answers, [True] * 50)
+        self.assertEqual((server.batches, server.coalesced), (1, 49))
+
+    def test_close_ends_connections(self): # close() also closes connections the client left open
+        async def scenario():
+            server = MembershipServer(BUILDERS["binary"](["alice"]))
+            await server.start(port=0)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"contains alice\n")
+            answer = await reader.readline()
+            await server.close()
+            eof = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            return server, answer, eof
+
+        server, answer, eof = asyncio.run(scenario())
+        self.assertEqual((answer, eof), (b"1\n", b""))
+        self.assertEqual(server._handlers, set())
+
+    def test_load_test(self): # load generator reports QPS and latency percentiles
+        async def client(server):
+            return await load_test("127.0.0.1", server.port, self.lookups.tolist(), connections=8, pipeline=4)
+
+        server, result = self.run_with_server(BUILDERS["bloom"](dataset.to_list(self.names)), client, max_pending=16)
+        print(f"\nLoad test: {result['qps']:.0f} QPS, p99={result['p99_ns'] / 1e3:.0f}µs")
+        self.assertEqual(result["requests"], len(self.lookups))
+        self.assertGreater(result["qps"], 0)
+        self.assertLessEqual(result["p50_ns"], result["p99_ns"])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
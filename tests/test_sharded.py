@@ -0,0 +1,54 @@
+import unittest
+import random
+import string
+from data_structures.sharded import ShardedMembership
+
+class TestSharded(unittest.TestCase):
+
+    def setUp(self):
+        """Random usernames plus absent lookups."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = [''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(5000)]
+        self.absent = [''.join(random.choice(self.chars) for _ in range(5)) for _ in range(1000)]
+
+    def test_scatter_gather(self): # batched answers come back in input order
+        with ShardedMembership.build(self.usernames, kind="hash", shards=3) as index:
+            queries = self.absent + self.usernames[::5]
+            random.shuffle(queries)
+            expected = [q in set(self.usernames) for q in queries]
+            self.assertEqual(index.contains_many(queries).tolist(), expected)
+            self.assertTrue(self.usernames[42] in index)
+            index.add("newuser")
+            self.assertTrue(index.contains("newuser"))
+            self.assertEqual(len(index), 5001)
+
+    def test_shard_stats(self): # every shard reports its keys and the work it did
+        with ShardedMembership.build(self.usernames, kind="cuckoo", shards=4) as index:
+            self.assertTrue(index.contains_many(self.usernames).all())
+            stats = index.stats()
+            print(f"\nShard stats: {stats}")
+            self.assertEqual(sum(s["keys"] for s in stats), 5000)
+            self.assertEqual(sum(s["queries"] for s in stats), 5000)
+            self.assertTrue(all(s["keys"] > 0 and s["memory_bytes"] > 0 for s in stats))
+
+    def test_bloom_shards(self): # bloom shards; unknown kinds are rejected
+        with ShardedMembership.build(self.usernames, kind="bloom", shards=2) as index:
+            self.assertTrue(index.contains_many(self.usernames).all())
+        with self.assertRaises(ValueError):
+            ShardedMembership(kind="linear")
+
+    def test_bloom_shards_grow(self): # adds past the first batch keep the false-positive rate low
+        with ShardedMembership(kind="bloom", shards=2) as index:
+            index.add_many(self.usernames[:10])
+            index.add_many(self.usernames[10:])
+            self.assertTrue(index.contains_many(self.usernames).all())
+            fpr = index.contains_many(self.absent).mean()
+            print(f"\nSharded bloom FPR after growing: {fpr:.4f}")
+            self.assertLess(fpr, 0.05)
+        with ShardedMembership(kind="cuckoo", shards=2, expected_items=5000) as index:
+            index.add_many(self.usernames[:10])
+            index.add_many(self.usernames[10:])
+            self.assertTrue(index.contains_many(self.usernames).all())
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
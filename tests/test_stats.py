@@ -0,0 +1,85 @@
+import unittest
+import random
+import string
+from collections import defaultdict
+from data_structures.stats import OpStats, measure_fpr, summarize_histogram
+from data_structures.Linear_search import linear_search
+from data_structures.Binary_search import binary_search
+from data_structures.Hash import HashTable
+from data_structures.Bloom import BloomFilter
+from data_structures.Cuckoo import CuckooFilter
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        """Random usernames plus absent lookups."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = [''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(2000)]
+        self.absent = [''.join(random.choice(self.chars) for _ in range(5)) for _ in range(1000)]
+
+    def test_search_comparisons(self): # linear and binary search count their comparisons
+        stats = OpStats()
+        self.assertTrue(linear_search(self.usernames, self.usernames[9], stats=stats))
+        self.assertFalse(linear_search(self.usernames, self.absent[0], stats=stats))
+        self.assertEqual(stats.histograms["comparisons"], {10: 1, 2000: 1})
+
+        stats = OpStats()
+        sorted_list = sorted(self.usernames)
+        self.assertTrue(all(binary_search(sorted_list, u, stats=stats) for u in self.usernames))
+        self.assertLessEqual(stats.summary()["comparisons"]["max"], 11)
+        self.assertEqual((stats.counters["lookups"], stats.counters["hits"]), (2000, 2000))
+
+    def test_hash_probes(self): # probes per lookup and chain occupancy, off again after disable
+        for engine in ("chaining", "open"):
+            ht = HashTable(256, engine=engine)
+            ht.enable_stats()
+            for u in self.usernames:
+                ht.insert(u)
+            self.assertTrue(ht.contains_many(self.usernames).all())
+            report = ht.collect_stats()
+            print(f"\nHashTable ({engine}) stats: {report}")
+            self.assertEqual((report["inserts"], report["lookups"], report["hits"]), (2000, 2000, 2000))
+            self.assertGreater(report["resizes"], 0)
+            self.assertGreaterEqual(report["probes"]["mean"], 1)
+            ht.disable_stats()
+            self.assertNotIn("contains", ht.__dict__)
+            self.assertIsNone(ht.stats)
+
+    def test_bloom_bits_probed(self): # bits read before an early miss, and measured FPR
+        bf = BloomFilter.from_fpr(2000, target_fpr=0.01)
+        bf.add_many(self.usernames)
+        bf.enable_stats()
+        self.assertTrue(all(bf.check(u) for u in self.usernames))
+        fpr = measure_fpr(bf, self.absent, lookup=bf.contains)
+        report = bf.collect_stats()
+        print(f"\nBloom stats: {report}, measured FPR={fpr:.4f}")
+        self.assertEqual(report["lookups"], 3000)
+        self.assertEqual(report["bits_probed"]["max"], bf.hash_count)
+        self.assertLess(report["bits_probed"]["mean"], bf.hash_count) # misses stop early
+        self.assertLess(fpr, 0.05)
+
+    def test_cuckoo_failed_inserts(self): # failed inserts, kicks and bucket occupancy
+        cf = CuckooFilter(64, bucket_size=2, max_kicks=20)
+        cf.enable_stats()
+        inserted = sum(cf.add(u) for u in self.usernames[:200])
+        self.assertTrue(all(cf.contains(u) for u in self.usernames[:20] if cf.lookup(u)))
+        report = cf.collect_stats()
+        self.assertEqual(report["inserts"], 200)
+        self.assertEqual(report["failed_inserts"], 200 - inserted)
+        self.assertEqual(report["bucket_occupancy"]["max"], 2)
+        self.assertGreater(report["kicks"]["max"], 0)
+        self.assertLessEqual(report["kicks"]["max"], cf.max_kicks)
+        self.assertEqual(report["failed_kick_chains"], report["stashed"])
+
+    def test_timer_hook(self): # timers wrap the instrumented operations
+        latencies = defaultdict(list)
+        ht = HashTable(100)
+        ht.enable_stats(timer=lambda op, ns: latencies[op].append(ns))
+        ht.insert("alice")
+        ht.contains("alice")
+        ht.contains("bob")
+        self.assertEqual((len(latencies["insert"]), len(latencies["contains"])), (1, 2))
+        self.assertEqual(summarize_histogram({}), {"count": 0, "mean": 0.0, "p50": 0, "p99": 0, "max": 0})
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,91 @@
+import unittest
+import os
+import random
+import string
+import tempfile
+from data_structures.Xor import XorFilter, benchmark_xor_filter
+
+class TestXorFilter(unittest.TestCase):
+
+    def setUp(self):
+        """Build an XOR filter from random usernames."""
+        self.chars = string.ascii_lowercase + string.digits
+        self.usernames = [''.join(random.choice(self.chars) for _ in range(5)) + str(i) for i in range(2000)]
+        self.xf = XorFilter.build(self.usernames)
+
+        self.target_exists = self.usernames[500]
+        self.target_absent = ''.join(random.choice(self.chars) for _ in range(8))
+
+    def test_found(self): # testing usernames that exist
+        result = self.xf.contains(self.target_exists)
+        print(f"\nXOR Filter existing username: {self.target_exists} → {result}")
+        self.assertTrue(result)
+
+    def test_not_found(self): # testing usernames that don't exist
+        result = self.xf.contains(self.target_absent)
+        print(f"\nXOR Filter absent username: {self.target_absent} → {result}")
+        # XOR filter may return false positives
+        self.assertIn(result, [True, False])
+
+    def test_no_false_negatives(self): # scalar and batch lookups find every username
+        self.assertTrue(all(self.xf.contains(u) for u in self.usernames))
+        self.assertTrue(self.xf.contains_many(self.usernames).all())
+        absent = [''.join(random.choice(self.chars) for _ in range(8)) for _ in range(200)]
+        self.assertEqual(self.xf.contains_many(absent).tolist(), [self.xf.contains(u) for u in absent])
+
+    def test_space_and_fpr(self): # ~9.8 bits per key at ~1/256, ~19.7 bits at ~1/65536
+        absent = [f"absent{i}" for i in range(20000)]
+        for bits, max_fpr in ((8, 0.008), (16, 0.001)):
+            xf = XorFilter.build(self.usernames, fingerprint_bits=bits)
+            fpr = xf.contains_many(absent).mean()
+            print(f"\nXOR Filter {bits}-bit fingerprints → {xf.bits_per_key():.2f} bits/key, FPR={fpr:.4f}")
+            self.assertLess(xf.bits_per_key(), 1.3 * bits)
+            self.assertLess(fpr, max_fpr)
+
+    def test_duplicates_and_streaming(self): # repeated usernames and chunked input
+        xf = XorFilter.from_iterable(self.usernames + self.usernames[:50], chunk_size=300)
+        self.assertEqual(len(xf), 2000)
+        self.assertTrue(xf.contains_many(self.usernames).all())
+        self.assertEqual(len(XorFilter.build([])), 0)
+
+    def test_save_load(self): # file round trip, memory-mapped and checksummed
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "reserved.xor")
+            self.xf.save(path)
+            loaded = XorFilter.load(path)
+            self.assertEqual((loaded.block_length, loaded.count, loaded.seed), (self.xf.block_length, 2000, self.xf.seed))
+            self.assertTrue(all(loaded.contains(u) for u in self.usernames))
+            self.assertTrue(loaded.contains_many(self.usernames).all())
+            loaded.close()
+
+            with open(path, 'r+b') as f: # flip one fingerprint bit
+                f.seek(-1, os.SEEK_END)
+                byte = f.read(1)
+                f.seek(-1, os.SEEK_END)
+                f.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                XorFilter.load(path)
+
+            self.xf.save(path)
+            with open(path, 'r+b') as f: # flip one bit of the seed in the header
+                f.seek(8)
+                byte = f.read(1)
+                f.seek(8)
+                f.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                XorFilter.load(path)
+
+    def test_benchmark_small(self): # testing small amount of usernames
+        n = 2000
+        t = benchmark_xor_filter(n)
+        print(f"\nBenchmark XOR Filter with n={n} → avg lookup time={t:.6e} seconds")
+        self.assertGreater(t, 0)
+
+    def test_benchmark_large(self): # testing large amount of usernames
+        n = 20000
+        t = benchmark_xor_filter(n)
+        print(f"\nBenchmark XOR Filter with n={n} → avg lookup time={t:.6e} seconds")
+        self.assertGreater(t, 0)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)